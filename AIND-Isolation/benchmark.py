@@ -0,0 +1,442 @@
+"""Benchmark suite of the Isolation engine and search agents.
+
+The suite runs on a fixed set of 7x7 positions, built with random moves from
+a fixed seed and covering the opening, the middle game and the endgame, and
+measures:
+
+- the board operations (`get_legal_moves()`, `count_legal_moves()`,
+  `get_move_mobilities()`, `forecast_move()`, `apply_move()` followed by
+  `undo_move()`, `hash()`, `copy()` and `random_playout()`), in calls per
+  second;
+- full fixed-depth searches with `MinimaxPlayer.minimax()` and
+  `AlphaBetaPlayer.alphabeta()` (iterative deepening to a fixed depth, as
+  the agent plays), in nodes per second, along with the number of nodes.
+
+Every timing is the best of several short rounds, interleaved between the
+benchmarks so that a slow period of the machine does not hit a single one,
+and the suite is run `--runs` times to report the median of each metric.
+The results can be written as JSON and compared against a stored baseline
+(by default `benchmark_baseline.json`): a speed more than `--tolerance`
+below the baseline is reported as a regression, and a different number of
+nodes as a change in the search itself. The speed of the whole machine
+drifts between runs, so the speeds are compared relative to that of a
+reference workload (a pure Python loop that does not use the engine) timed
+in the same rounds. The speeds are only comparable on the same machine; the
+node counts are comparable anywhere.
+
+    python benchmark.py --json results.json
+    python benchmark.py --baseline results.json
+
+The `--sizes` option also measures how the speed of the board and of the
+agents scales with the size of the board. For every size it uses a few
+positions (an opening, where the first moves can go to any blank cell, and
+middle game positions) and measures move generation, random playouts,
+alpha-beta nodes per second and depth in one turn, and Monte Carlo tree
+search iterations per second:
+
+    python benchmark.py --sizes 7 15 20 32
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+from collections import OrderedDict
+from statistics import median
+
+from isolation import Board, Deadline, PLAYER_1, PLAYER_2
+from game_agent import AlphaBetaPlayer, MinimaxPlayer
+from mcts_agent import MCTSPlayer
+from sample_players import improved_score
+from search_stats import SearchStats, instrument, summarize
+
+TIME_LIMIT = 150  # number of milliseconds of each searched turn
+NUM_POSITIONS = 4  # number of positions of each board size
+SEED = 0  # seed of the benchmark positions
+
+# Number of plies played to reach the positions of each phase of the game
+# in the suite, and number of positions of each phase
+PHASES = [("opening", 2), ("middle", 12), ("endgame", 24)]
+POSITIONS_PER_PHASE = 3
+
+# Depth of the fixed-depth searches of the suite
+MINIMAX_DEPTH = 3
+ALPHABETA_DEPTH = 7
+
+# Name of the benchmark of the reference workload; the other speeds are
+# compared with the baseline relative to it
+REFERENCE = "reference"
+
+# Number of runs of the suite whose median is compared with the baseline,
+# and fraction of a baseline speed, relative to the reference workload, that
+# can be lost before it counts as a regression (the relative speeds of an
+# unchanged tree stay within about 17% of the baseline)
+RUNS = 3
+TOLERANCE = 0.25
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     "benchmark_baseline.json")
+
+
+def random_position(size, plies, rng):
+    """Return a size x size board after `plies` random moves that is not
+    over yet, or None if the random game ends first.
+    """
+    game = Board(PLAYER_1, PLAYER_2, size, size)
+    for _ in range(plies):
+        moves = game.get_legal_moves(shuffle=False)
+        if not moves:
+            return None
+        game.apply_move(rng.choice(moves))
+    return game if game.get_legal_moves() else None
+
+
+def suite_positions(seed=SEED):
+    """Return the (phase, position) pairs of the suite."""
+    rng = random.Random(seed)
+    positions = []
+    for phase, plies in PHASES:
+        count = 0
+        while count < POSITIONS_PER_PHASE:
+            game = random_position(7, plies, rng)
+            if game is not None:
+                positions.append((phase, game))
+                count += 1
+    return positions
+
+
+def make_positions(size, count, seed):
+    """Return `count` positions of a size x size board: an opening with one
+    player on the board, and middle game positions with about a fifth of the
+    cells blocked, reached with random moves from a fixed seed.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        plies = 1 if not positions else size * size // 5
+        game = random_position(size, plies, rng)
+        if game is not None:
+            positions.append(game)
+    return positions
+
+
+def rates(benchmarks, duration=0.2, repeat=10):
+    """Return the number of calls per second of several functions.
+
+    Each function is called on every element of its arguments in turn for
+    rounds of about `duration` seconds, and its rate is the best of `repeat`
+    rounds (after a warm-up round). The rounds of the functions are
+    interleaved, so a slow period of the machine lowers one round of each
+    function rather than all the rounds of one function.
+
+    Parameters
+    ----------
+    benchmarks : OrderedDict<str, (callable, list)>
+        The function and the arguments of each benchmark, by name.
+
+    Returns
+    -------
+    OrderedDict<str, float>
+        The calls per second of each benchmark, by name.
+    """
+    best = OrderedDict((name, 0.) for name in benchmarks)
+    for round_ in range(repeat + 1):
+        for name, (fn, args) in benchmarks.items():
+            calls = 0
+            start = timeit.default_timer()
+            while True:
+                for arg in args:
+                    fn(arg)
+                calls += len(args)
+                elapsed = timeit.default_timer() - start
+                if elapsed >= duration:
+                    break
+            if round_ > 0:
+                best[name] = max(best[name], calls / elapsed)
+    return best
+
+
+def reference_workload(n):
+    """Pure Python loop independent of the engine, whose speed measures the
+    speed of the machine at the time of a run.
+    """
+    counts = {}
+    for i in range(n):
+        counts[i & 63] = counts.get(i & 63, 0) + (i >> 1)
+    return counts
+
+
+def board_benchmarks(positions, duration=0.2, repeat=10):
+    """Return the calls per second of the board operations on `positions`,
+    by operation name.
+    """
+    games = [game.copy() for game in positions]
+    pairs = [(game, move) for game in games
+             for move in game.get_legal_moves(shuffle=False)]
+
+    def apply_undo(pair):
+        pair[0].apply_move(pair[1])
+        pair[0].undo_move()
+
+    # operations on one position, and on one (position, legal move) pair,
+    # timed in the same rounds as the reference workload
+    benchmarks = OrderedDict([
+        (REFERENCE, (reference_workload, [200])),
+        ("get_legal_moves",
+         (lambda game: game.get_legal_moves(shuffle=False), games)),
+        ("count_legal_moves", (lambda game: game.count_legal_moves(), games)),
+        ("get_move_mobilities",
+         (lambda game: game.get_move_mobilities(), games)),
+        ("hash", (lambda game: game.hash(), games)),
+        ("copy", (lambda game: game.copy(), games)),
+        ("random_playout", (lambda game: game.random_playout(), games)),
+        ("forecast_move",
+         (lambda pair: pair[0].forecast_move(pair[1]), pairs)),
+        ("apply_undo_move", (apply_undo, pairs)),
+    ])
+    return OrderedDict(
+        (name, OrderedDict([("calls_per_sec", value)]))
+        for name, value in rates(benchmarks, duration, repeat).items())
+
+
+def search_benchmark(make_player, search, positions, repeat=5):
+    """Search every position with a new agent and return the number of
+    nodes and the nodes per second.
+
+    The nodes are counted by a first run with search statistics, and the
+    time of each position is the best of `repeat` runs without them, since
+    the searches are deterministic but the statistics slow them down.
+
+    Parameters
+    ----------
+    make_player : callable
+        Return a new agent.
+
+    search : callable
+        Called as `search(player, game)` to run the search of a position
+        (with the agent registered as the active player).
+    """
+    nodes = 0
+    best = [float("inf")] * len(positions)
+    for run in range(repeat + 1):
+        for idx, game in enumerate(positions):
+            player = make_player()
+            if run == 0:
+                player.stats = SearchStats()
+            player.time_left = lambda: float("inf")
+            board = game.copy_with_active_player(player)
+            start = timeit.default_timer()
+            search(player, board)
+            elapsed = timeit.default_timer() - start
+            if run == 0:
+                nodes += player.stats.nodes
+            else:
+                best[idx] = min(best[idx], elapsed)
+    return OrderedDict([("nodes", nodes),
+                        ("nodes_per_sec", nodes / sum(best))])
+
+
+def iterative_deepening(player, game, depth=ALPHABETA_DEPTH):
+    """Search a position like AlphaBetaPlayer, to a fixed depth."""
+    player.new_search()
+    for iteration in range(1, depth + 1):
+        player.pv_move = player.aspiration_search(game, iteration)
+
+
+def run_suite(seed=SEED, duration=0.2, repeat=10):
+    """Run the benchmark suite and return the results by benchmark name."""
+    positions = [game for _, game in suite_positions(seed)]
+    results = board_benchmarks(positions, duration, repeat)
+    results["minimax_depth_{}".format(MINIMAX_DEPTH)] = search_benchmark(
+        lambda: MinimaxPlayer(score_fn=improved_score),
+        lambda player, game: player.minimax(game, MINIMAX_DEPTH),
+        positions, repeat)
+    results["alphabeta_depth_{}".format(ALPHABETA_DEPTH)] = search_benchmark(
+        lambda: AlphaBetaPlayer(score_fn=improved_score, opening_book=None),
+        iterative_deepening, positions, repeat)
+    return results
+
+
+def median_results(runs):
+    """Return the median of every metric over several runs of the suite."""
+    return OrderedDict(
+        (name, OrderedDict((metric, median(run[name][metric] for run in runs))
+                           for metric in metrics))
+        for name, metrics in runs[0].items())
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Compare the results of the suite with a baseline.
+
+    The speed of the whole machine varies between runs, so when both have a
+    reference workload speed, the speeds are compared relative to it.
+
+    Returns
+    -------
+    list<(str, str, float, float, str)>
+        For each metric of the baseline: the benchmark name, the metric, the
+        baseline and current values, and the status, "ok", "regression" (a
+        speed more than `tolerance` below the baseline), "changed" (a
+        different number of nodes) or "missing".
+    """
+    scale = 1.
+    if REFERENCE in results and REFERENCE in baseline:
+        scale = (results[REFERENCE]["calls_per_sec"] /
+                 baseline[REFERENCE]["calls_per_sec"])
+    rows = []
+    for name, metrics in baseline.items():
+        for metric, base in metrics.items():
+            value = results.get(name, {}).get(metric)
+            if value is None:
+                status = "missing"
+            elif name == REFERENCE:
+                status = "ok"
+            elif metric.endswith("_per_sec"):
+                status = ("regression"
+                          if value < (1 - tolerance) * base * scale else "ok")
+            else:
+                status = "changed" if value != base else "ok"
+            rows.append((name, metric, base, value, status))
+    return rows
+
+
+def format_comparison(rows):
+    """Return the result of `compare()` as a text table."""
+    lines = ["{:<22}{:<15}{:>12}{:>12}{:>8}  {}".format(
+        "Benchmark", "Metric", "Baseline", "Current", "Ratio", "Status")]
+    reference = None
+    for name, metric, base, value, status in rows:
+        ratio = "{:.2f}".format(value / base) if value and base else "-"
+        lines.append("{:<22}{:<15}{:>12.0f}{:>12}{:>8}  {}".format(
+            name, metric, base,
+            "-" if value is None else "{:.0f}".format(value), ratio, status))
+        if name == REFERENCE and value:
+            reference = value / base
+    if reference is not None:
+        lines.append("Speeds are compared relative to the reference "
+                     "workload (ratio {:.2f}).".format(reference))
+    return "\n".join(lines)
+
+
+def search_agents(positions, time_limit):
+    """Play one turn with each agent on every position, and return the
+    alpha-beta summary (see `search_stats.summarize()`) and the number of
+    MCTS iterations per second.
+    """
+    alphabeta = instrument(AlphaBetaPlayer(score_fn=improved_score,
+                                           opening_book=None),
+                           label="AlphaBeta")
+    iterations = 0
+    elapsed = 0.
+    for game in positions:
+        for player in (alphabeta, MCTSPlayer()):
+            board = game.copy_with_active_player(player)
+            start = timeit.default_timer()
+            player.get_move(board, Deadline(time_limit))
+            if player is not alphabeta:
+                elapsed += timeit.default_timer() - start
+                iterations += player.root.visits if player.root else 0
+    summary = summarize(alphabeta.stats.records)["AlphaBeta"]
+    return summary, iterations / elapsed if elapsed else 0.
+
+
+def measure(size, seed=SEED, time_limit=TIME_LIMIT, count=NUM_POSITIONS):
+    """Return the benchmark results of a board size."""
+    positions = make_positions(size, count, seed)
+    summary, mcts_rate = search_agents(positions, time_limit)
+    speeds = rates(OrderedDict([
+        ("movegen_per_sec",
+         (lambda game: game.get_legal_moves(shuffle=False), positions)),
+        ("mobilities_per_sec",
+         (lambda game: game.get_move_mobilities(), positions)),
+        ("playouts_per_sec", (lambda game: game.random_playout(), positions)),
+    ]))
+    return OrderedDict([
+        ("size", size),
+        ("movegen_per_sec", speeds["movegen_per_sec"]),
+        ("mobilities_per_sec", speeds["mobilities_per_sec"]),
+        ("playouts_per_sec", speeds["playouts_per_sec"]),
+        ("nodes_per_sec", summary["nodes_per_sec"]),
+        ("depth", summary["depth"]),
+        ("min_margin_ms", summary["min_margin_ms"]),
+        ("mcts_iterations_per_sec", mcts_rate),
+    ])
+
+
+def format_results(results):
+    """Return the results of `measure()` for several sizes as a text table."""
+    lines = ["{:>6}{:>11}{:>11}{:>10}{:>10}{:>7}{:>8}{:>10}".format(
+        "Size", "Movegen/s", "Mobility/s", "Playout/s", "Nodes/s", "Depth",
+        "Margin", "MCTS it/s")]
+    for result in results:
+        lines.append("{:>6}{:>11.0f}{:>11.0f}{:>10.0f}{:>10.0f}{:>7.2f}"
+                     "{:>8.1f}{:>10.0f}".format(
+                         "{0}x{0}".format(result["size"]),
+                         result["movegen_per_sec"],
+                         result["mobilities_per_sec"],
+                         result["playouts_per_sec"], result["nodes_per_sec"],
+                         result["depth"], result["min_margin_ms"],
+                         result["mcts_iterations_per_sec"]))
+    return "\n".join(lines)
+
+
+def main(seed=SEED, json_path=None, baseline_path=DEFAULT_BASELINE_PATH,
+         tolerance=TOLERANCE, sizes=None, time_limit=TIME_LIMIT, runs=RUNS):
+    """Run the suite `runs` times (and the board size benchmark if `sizes` is
+    given), and return False if the median of a speed regressed from the
+    baseline.
+    """
+    results = median_results([run_suite(seed) for _ in range(runs)])
+    if json_path is not None:
+        with open(json_path, "w") as json_file:
+            json.dump(OrderedDict([("seed", seed), ("results", results)]),
+                      json_file, indent=2)
+
+    ok = True
+    if baseline_path is not None and os.path.exists(baseline_path):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file, object_pairs_hook=OrderedDict)
+        if baseline["seed"] != seed:
+            print("The baseline was measured with seed {}".format(
+                baseline["seed"]))
+        rows = compare(results, baseline["results"], tolerance)
+        print(format_comparison(rows))
+        ok = all(row[4] != "regression" for row in rows)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if sizes:
+        print()
+        print(format_results([measure(size, seed, time_limit)
+                              for size in sizes]))
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the speed of the " +
+        "board operations and of fixed-depth searches on fixed positions, " +
+        "and compare it with a baseline.")
+    parser.add_argument('-s', '--seed', type=int, default=SEED,
+                        help="Seed of the random positions.")
+    parser.add_argument('--json', default=None,
+                        help="Write the results to this JSON file.")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH,
+                        help="Compare the results with this JSON file " +
+                        "written by --json (default: %(default)s).")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="Fraction of a baseline speed that can be lost " +
+                        "before it counts as a regression.")
+    parser.add_argument('--runs', type=int, default=RUNS,
+                        help="Number of runs of the suite; the median of " +
+                        "each metric is reported.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=None,
+                        help="Also measure the agents on boards of these " +
+                        "sizes (width and height).")
+    parser.add_argument('-t', '--time-limit', type=float, default=TIME_LIMIT,
+                        help="Milliseconds of each searched turn of the " +
+                        "board size benchmark.")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.seed, args.json, args.baseline, args.tolerance,
+                       args.sizes, args.time_limit, args.runs) else 1)
@@ -2,7 +2,17 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import gc
 import random
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
+from operator import itemgetter
+
+from isolation import Deadline
+from isolation.endgame import EndgameSolver, EndgameTimeout
+from opening_book import DEFAULT_BOOK_PATH, OpeningBook
+from sample_players import improved_score
 
 
 class SearchTimeout(Exception):
@@ -10,6 +20,43 @@ class SearchTimeout(Exception):
     pass
 
 
+def timeout_check(time_left, threshold):
+    """Return a function of no arguments that returns True once the search
+    must stop, i.e., when fewer than `threshold` milliseconds are left.
+
+    With an `isolation.Deadline` (as passed by `Board.play`) the clock is only
+    read every few calls; any other time_left() function is called every
+    time.
+    """
+    if isinstance(time_left, Deadline):
+        return partial(time_left.expired, threshold)
+    return lambda: time_left() < threshold
+
+
+@contextmanager
+def paused_gc():
+    """Pause the garbage collector for the duration of a search.
+
+    A full collection can take longer than the timer threshold, so it must
+    not start in the middle of a search, nor when the collector is enabled
+    again at the end of the search. Only the young generations are collected
+    here (which is cheap, unlike a full collection of a large heap): before
+    the search, and before enabling the collector again, so that the
+    allocations of the search do not trigger a collection cascading into
+    the old generation. Full collections then run between searches.
+    """
+    enabled = gc.isenabled()
+    if enabled:
+        gc.collect(1)
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.collect(0)
+            gc.enable()
+
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -35,9 +82,9 @@ def custom_score(game, player):
         The heuristic value of the current game state to the specified player.
     """
     # get the number of moves that i could do
-    my_moves = len(game.get_legal_moves(player))
+    my_moves = game.count_legal_moves(player)
     # get the number of moves that my opponent could do
-    opponent_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    opponent_moves = game.count_legal_moves(game.get_opponent(player))
 
     return float(my_moves - opponent_moves)
 
@@ -64,9 +111,9 @@ def custom_score_2(game, player):
         The heuristic value of the current game state to the specified player.
     """
     # get the number of moves that i could do
-    my_moves = len(game.get_legal_moves(player))
+    my_moves = game.count_legal_moves(player)
     # get the number of moves that my opponent could do
-    opponent_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    opponent_moves = game.count_legal_moves(game.get_opponent(player))
 
     return float(my_moves -  (2 *opponent_moves))
 
@@ -94,9 +141,9 @@ def custom_score_3(game, player):
         The heuristic value of the current game state to the specified player.
     """
     # get the number of moves that i could do
-    my_moves = len(game.get_legal_moves(player))
+    my_moves = game.count_legal_moves(player)
     # get the number of moves that my opponent could do
-    opponent_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    opponent_moves = game.count_legal_moves(game.get_opponent(player))
 
     if (my_moves == 0):
         return float("inf")
@@ -107,6 +154,115 @@ def custom_score_3(game, player):
     return float(my_moves / opponent_moves)
 
 
+def child_mobilities(game, player):
+    """Return the number of legal moves of the given player and of their
+    opponent after each legal move of the active player.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : object
+        A player instance in the current game.
+
+    Returns
+    -------
+    list<((int, int), int, int)>
+        The move of the active player, and the number of moves of `player`
+        and of their opponent in the position reached with that move.
+    """
+    mobilities = game.get_move_mobilities()
+    if player == game.active_player:
+        return mobilities
+    return [(move, opp, own) for move, own, opp in mobilities]
+
+
+def custom_score_batch(game, player):
+    """Calculate custom_score() for every child of a game state at once.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        An instance of `isolation.Board` encoding the current state of the
+        game (e.g., player locations and blocked cells).
+
+    player : object
+        A player instance in the current game.
+
+    Returns
+    -------
+    list<((int, int), float)>
+        Each legal move of the active player with the heuristic value, for
+        the specified player, of the game state after that move.
+    """
+    return [(move, float(own - opp))
+            for move, own, opp in child_mobilities(game, player)]
+
+
+def custom_score_2_batch(game, player):
+    """Calculate custom_score_2() for every child of a game state at once
+    (see custom_score_batch()).
+    """
+    return [(move, float(own - (2 * opp)))
+            for move, own, opp in child_mobilities(game, player)]
+
+
+def custom_score_3_batch(game, player):
+    """Calculate custom_score_3() for every child of a game state at once
+    (see custom_score_batch()).
+    """
+    scores = []
+    for move, own, opp in child_mobilities(game, player):
+        if own == 0:
+            scores.append((move, float("inf")))
+        elif opp == 0:
+            scores.append((move, float("-inf")))
+        else:
+            scores.append((move, float(own / opp)))
+    return scores
+
+
+def improved_score_batch(game, player):
+    """Calculate sample_players.improved_score() for every child of a game
+    state at once (see custom_score_batch()).
+    """
+    mover = player == game.active_player
+    scores = []
+    for move, own, opp in child_mobilities(game, player):
+        # the game is over when the player to move next has no legal moves
+        if (opp if mover else own) == 0:
+            scores.append((move, float("inf") if mover else float("-inf")))
+        else:
+            scores.append((move, float(own - opp)))
+    return scores
+
+
+# Batch versions of the heuristics, used by the search to score all the
+# children of the positions one ply above the search horizon at once
+BATCH_SCORES = {
+    custom_score: custom_score_batch,
+    custom_score_2: custom_score_2_batch,
+    custom_score_3: custom_score_3_batch,
+    improved_score: improved_score_batch,
+}
+
+
+def get_batch_score(score_fn):
+    """Return the batch version of a heuristic (see BATCH_SCORES), or None.
+
+    Wrappers of a heuristic (e.g., `score_cache.ScoreCache`) keep it in their
+    `score_fn` attribute and use its batch version. Heuristic objects (e.g.,
+    `tuning.WeightedScore`) provide theirs as a `batch_score` method.
+    """
+    score_fn = getattr(score_fn, "score_fn", score_fn)
+    batch = getattr(score_fn, "batch_score", None)
+    if batch is not None:
+        return batch
+    return BATCH_SCORES.get(score_fn)
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -140,7 +296,11 @@ class MinimaxPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
+
+    The search can be instrumented by attaching a `search_stats.SearchStats`
+    object to the `stats` attribute (see search_stats.instrument()).
     """
+    stats = None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -171,6 +331,9 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        stats = self.stats
+        if stats is not None:
+            stats.start_move(game, time_left, self.TIMER_THRESHOLD)
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -179,11 +342,15 @@ class MinimaxPlayer(IsolationPlayer):
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            if stats is not None:
+                stats.end_iteration(self.search_depth)
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
+        if stats is not None:
+            stats.end_move(best_move, "search")
         # Return the best move from the last completed search iteration
         return best_move
 
@@ -192,12 +359,20 @@ class MinimaxPlayer(IsolationPlayer):
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
+        stats = self.stats
+        score_fn = self.score
+        if stats is not None:
+            score_fn = stats.timed(score_fn, "score")
+        timed_out = timeout_check(self.time_left, self.TIMER_THRESHOLD)
+
         # max-value function (helper function)
         def max_value(self, game, depth):
 
             # check for timeout
-            if self.time_left() < self.TIMER_THRESHOLD:
+            if timed_out():
                 raise SearchTimeout()
+            if stats is not None:
+                stats.nodes += 1
 
             # get the valid move for this player
             valid_moves = game.get_legal_moves()
@@ -207,17 +382,24 @@ class MinimaxPlayer(IsolationPlayer):
 
             # terminal state if reach the end of the depth or have no valid move
             if (depth == 0) or (not valid_moves):
-                return self.score(game, self)
+                return score_fn(game, self)
+            if stats is not None:
+                stats.expanded += 1
+                stats.children += len(valid_moves)
 
             for m in valid_moves:
-                best_value = max(best_value, min_value(self, game.forecast_move(m), depth-1))
+                game.apply_move(m)
+                best_value = max(best_value, min_value(self, game, depth-1))
+                game.undo_move()
             return best_value
 
         # min-value function (helper function)
         def min_value(self, game, depth):
             # check for timeout
-            if self.time_left() < self.TIMER_THRESHOLD:
+            if timed_out():
                 raise SearchTimeout()
+            if stats is not None:
+                stats.nodes += 1
 
             # get the valid move for this player
             valid_moves = game.get_legal_moves()
@@ -227,12 +409,23 @@ class MinimaxPlayer(IsolationPlayer):
 
             # terminal state if reach the end of the depth or have no valid move
             if (depth == 0) or (not valid_moves):
-                return self.score(game, self)
+                return score_fn(game, self)
+            if stats is not None:
+                stats.expanded += 1
+                stats.children += len(valid_moves)
 
             for m in valid_moves:
-                best_value = min(best_value, max_value(self, game.forecast_move(m), depth-1))
+                game.apply_move(m)
+                best_value = min(best_value, max_value(self, game, depth-1))
+                game.undo_move()
             return best_value
 
+        # search a private copy in place with apply_move/undo_move, so that a
+        # timeout cannot leave the caller's board modified
+        game = game.copy()
+        if stats is not None:
+            # time the move generation of the private copy only
+            game.get_legal_moves = stats.timed(game.get_legal_moves, "movegen")
         # get the legel move for this player
         valid_moves = game.get_legal_moves()
         # int best_move, best_score
@@ -242,20 +435,319 @@ class MinimaxPlayer(IsolationPlayer):
         # check for terminal state
         if (not valid_moves):
             return best_move
+        if stats is not None:
+            stats.nodes += 1
+            stats.expanded += 1
+            stats.children += len(valid_moves)
         # check for all legel move to get the best one
         for m in valid_moves:
-            score = min_value(self, game.forecast_move(m), depth - 1)
+            game.apply_move(m)
+            score = min_value(self, game, depth - 1)
+            game.undo_move()
             if score > best_score:
                 best_score = score
                 best_move = m
 
         return best_move
 
+# Bound types of the values stored in the transposition table
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Keys xored into position hashes depending on whether player 1 or player 2
+# is the maximizing (root) player, since stored values are from their side
+MAXIMIZER_KEYS = (0, 0x9E3779B97F4A7C15)
+
+# Width of the null windows used to test whether a move improves on the best
+# move of a position (principal variation search)
+NULL_WINDOW = 1e-6
+
+# Half width of the window around the score of the previous iteration used
+# to start each iteration of iterative deepening (aspiration window)
+ASPIRATION_WINDOW = 1.
+
+
+class TranspositionTable:
+    """Fixed-size table of alpha-beta search results keyed by position hash.
+
+    Every slot holds a single entry (key, depth, bound, value, move,
+    generation). When a new result maps to an occupied slot it replaces the
+    stored entry if that entry comes from an earlier search (an older
+    generation) or was searched to a depth no greater than the new one, so
+    the table never grows beyond `size` entries.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The number of slots in the table.
+    """
+    def __init__(self, size=2**16):
+        self.size = size
+        self.generation = 0
+        self._slots = [None] * size
+
+    def new_search(self):
+        """Start a new generation so that entries from previous searches are
+        replaced first, while still being used until they are overwritten.
+        """
+        self.generation += 1
+
+    def clear(self):
+        """Remove all entries from the table."""
+        self._slots = [None] * self.size
+
+    def lookup(self, key):
+        """Return the (key, depth, bound, value, move, generation) entry stored
+        for the key, or None if the position is not in the table.
+        """
+        entry = self._slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def probe(self, key, depth, alpha, beta):
+        """Use the stored result for a position searched to `depth` plies with
+        the window (alpha, beta).
+
+        Returns
+        -------
+        (float or None, float, float, (int, int) or None)
+            The stored value if it is enough to cut off the search (None
+            otherwise), the window tightened with the stored bound, and the
+            best move found by the previous search of the position.
+        """
+        entry = self.lookup(key)
+        if entry is None:
+            return None, alpha, beta, None
+        _, tt_depth, tt_bound, tt_value, tt_move, _ = entry
+        if tt_depth >= depth:
+            if tt_bound == EXACT:
+                return tt_value, alpha, beta, tt_move
+            if tt_bound == LOWER_BOUND:
+                alpha = max(alpha, tt_value)
+            else:
+                beta = min(beta, tt_value)
+            if alpha >= beta:
+                return tt_value, alpha, beta, tt_move
+        return None, alpha, beta, tt_move
+
+    def save(self, key, depth, value, alpha, beta, move):
+        """Store the value of a position searched to `depth` plies with the
+        window (alpha, beta), and the move that produced it.
+        """
+        if value <= alpha:
+            bound = UPPER_BOUND
+        elif value >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        idx = key % self.size
+        entry = self._slots[idx]
+        if entry is None or entry[5] != self.generation or depth >= entry[1]:
+            self._slots[idx] = (key, depth, bound, value, move, self.generation)
+
+
+class TimeManager:
+    """Decide when iterative deepening should stop before the timer expires.
+
+    The time of the next iteration is predicted from the time of the last
+    one, multiplied by the growth rate of the previous iterations (the
+    effective branching factor of the search), and an iteration is only
+    started if it is predicted to finish before the timer threshold, since
+    the result of an unfinished iteration is thrown away. Once the best move
+    has been the same for `stable_iterations` iterations, the search also
+    stops as soon as it has used `soft_fraction` of the time of the move.
+
+    Parameters
+    ----------
+    soft_fraction : float (optional)
+        The fraction of the time available at the start of the move after
+        which the search stops if the best move is stable.
+
+    stable_iterations : int (optional)
+        The number of consecutive iterations that must return the same best
+        move for it to be considered stable.
+
+    min_growth, max_growth : float (optional)
+        The bounds of the predicted ratio between the times of consecutive
+        iterations.
+    """
+    def __init__(self, soft_fraction=0.5, stable_iterations=4,
+                 min_growth=1.5, max_growth=8.):
+        self.soft_fraction = soft_fraction
+        self.stable_iterations = stable_iterations
+        self.min_growth = min_growth
+        self.max_growth = max_growth
+        self.time_left = None
+        self.threshold = 0.
+
+    def start(self, time_left, threshold):
+        """Start timing the search of a new move."""
+        self.time_left = time_left
+        self.threshold = threshold
+        self.available = time_left() - threshold
+        self.times = []
+        self.best_move = None
+        self.stable = 0
+        self._last = self.available
+
+    def predict(self):
+        """Return the predicted number of milliseconds of the next
+        iteration, from the times of the completed iterations.
+        """
+        if not self.times:
+            return 0.
+        growth = self.max_growth
+        if len(self.times) >= 2 and self.times[-2] > 0:
+            growth = self.times[-1] / self.times[-2]
+        growth = min(max(growth, self.min_growth), self.max_growth)
+        return self.times[-1] * growth
+
+    def next_iteration(self, best_move):
+        """Record the best move of the iteration that just completed, and
+        return whether the next iteration should be started.
+        """
+        remaining = self.time_left() - self.threshold
+        self.times.append(self._last - remaining)
+        self._last = remaining
+        if best_move == self.best_move:
+            self.stable += 1
+        else:
+            self.best_move, self.stable = best_move, 1
+
+        if self.predict() > remaining:
+            return False
+        if (self.stable >= self.stable_iterations and
+                self.available - remaining > self.soft_fraction * self.available):
+            return False
+        return True
+
+
+def move_to_front(moves, first_move):
+    """Move `first_move` to the front of the list of moves, if present."""
+    if first_move is not None and first_move in moves:
+        moves.remove(first_move)
+        moves.insert(0, first_move)
+    return moves
+
+
 class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Search results are kept in a transposition table that persists across
+    iterations and turns, and is used to cut off the search, narrow the
+    alpha-beta window and search the previously best move first.
+
+    Moves are searched in the order: best move of the previous iteration
+    (principal variation) or transposition table move, killer moves that
+    caused a cutoff at the same ply, then the other moves by decreasing
+    history score. Only the first move of each position is searched with the
+    full window; the others are first searched with a null window to test
+    whether they beat it (principal variation search). Each iteration of
+    iterative deepening starts with an aspiration window around the score of
+    the previous iteration.
+
+    The root search can be restricted to a subset of the legal moves by
+    setting `root_moves` (e.g., to split the root between processes), and the
+    value of the last completed search is available in `root_score`. After
+    get_move(), `pv_score` and `pv_depth` hold the score (for the agent) and
+    depth of the last completed iteration, or the exact value found by the
+    endgame solver with depth 0; they are None when the move was not searched.
+
+    Moves of the first plies of the game can be looked up in an opening book
+    (see opening_book.py) instead of being searched. The book is only valid
+    for the heuristic it was generated with (custom_score for
+    `DEFAULT_BOOK_PATH`), so it is not used by default.
+
+    Iterative deepening stops once the game is solved (the root value is a
+    win or a loss, or the search is deeper than the number of blank cells),
+    and the time manager ends it early when the next iteration cannot finish
+    in time or the best move is stable.
+
+    The search can be instrumented by attaching a `search_stats.SearchStats`
+    object to the `stats` attribute (see search_stats.instrument()).
+
+    Parameters
+    ----------
+    tt_size : int (optional)
+        The number of entries of the transposition table.
+
+    opening_book : str or None (optional)
+        The path of the opening book file, or None (the default) to search
+        every move.
+
+    time_management : bool (optional)
+        Stop iterative deepening with a `TimeManager` instead of searching
+        until the timer expires.
     """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 tt_size=2**16, opening_book=None, time_management=True):
+        super().__init__(search_depth, score_fn, timeout)
+        self.tt = TranspositionTable(tt_size)
+        self.time_manager = TimeManager() if time_management else None
+        self.book = OpeningBook(opening_book) if opening_book else None
+        self.endgame = EndgameSolver()
+        self.root_moves = None
+        self.root_score = float("-inf")
+        self.pv_move = None
+        self.pv_score = None
+        self.pv_depth = None
+        self.killers = {}
+        self.history = (defaultdict(int), defaultdict(int))
+        self.stats = None
+
+    def new_search(self):
+        """Reset the move ordering state before searching a new position;
+        killer moves are cleared and history scores are aged.
+        """
+        self.tt.new_search()
+        self.pv_move = None
+        self.pv_score = None
+        self.pv_depth = None
+        self.killers = {}
+        for history in self.history:
+            for move in history:
+                history[move] //= 2
+
+    def order_moves(self, game, moves, ply, first_move):
+        """Sort the legal moves of a position in place for searching.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The position the moves are legal in.
+
+        moves : list<(int, int)>
+            The legal moves of the active player.
+
+        ply : int
+            The distance of the position from the root of the search.
+
+        first_move : (int, int) or None
+            A move to search before any other (e.g., from the principal
+            variation or the transposition table).
+
+        Returns
+        -------
+        list<(int, int)>
+            The sorted list of moves.
+        """
+        moves.sort(key=self.history[game.move_count % 2].__getitem__,
+                   reverse=True)
+        for killer in reversed(self.killers.get(ply, ())):
+            move_to_front(moves, killer)
+        return move_to_front(moves, first_move)
+
+    def update_cutoff(self, game, move, ply, depth):
+        """Record a move that caused a cutoff as a killer move of its ply,
+        and increase its history score by the square of the searched depth.
+        """
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[game.move_count % 2][move] += depth * depth
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -288,90 +780,299 @@ class AlphaBetaPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
-        best_move = (-1, -1)
+        stats = self.stats
+        if stats is not None:
+            stats.start_move(game, time_left, self.TIMER_THRESHOLD)
+        self.new_search()
+
+        with paused_gc():
+            best_move, source = self.choose_move(game, time_left)
+        if stats is not None:
+            stats.end_move(best_move, source)
+        return best_move
 
-        # Check if my agent is first to move
-        if (game._board_state[-1] == -1):
-            if (game.get_legal_moves()):
-                best_move = (4, 4)
-            return best_move
+    def choose_move(self, game, time_left):
+        """Select the move returned by get_move().
+
+        Returns
+        -------
+        ((int, int), str)
+            The move, and how it was chosen: "forced", "book", "endgame" or
+            "search".
+        """
+        best_move = (-1, -1)
+        # Do not spend any time on forced moves
+        legal_moves = game.get_legal_moves(shuffle=False)
+        if len(legal_moves) <= 1:
+            return (legal_moves[0] if legal_moves else best_move), "forced"
+        # play a legal move even if the first iteration cannot finish (e.g.,
+        # the first move of a large board)
+        best_move = legal_moves[0]
+
+        # Play the book move in the opening
+        if self.book is not None:
+            book_move = self.book.lookup(game)
+            if book_move is not None:
+                return book_move, "book"
+
+        # Solve the game exactly once the players are separated, using at most
+        # half of the remaining time (solved states are kept for the next
+        # turns, and the search below is used if the solver runs out of time)
+        if game.is_partitioned():
+            self.endgame.time_left = time_left
+            self.endgame.threshold = max(time_left() / 2, self.TIMER_THRESHOLD)
+            try:
+                best_move, self.pv_score = self.endgame.solve(game)
+                self.pv_depth = 0
+                return best_move, "endgame"
+            except EndgameTimeout:
+                pass
+        time_manager = self.time_manager
+        if time_manager is not None:
+            time_manager.start(time_left, self.TIMER_THRESHOLD)
+        # the game cannot last more moves than there are blank cells
+        max_depth = len(game.get_blank_spaces())
         try :
             # Iterative Deepning, stop when timeout
             depth = 0
             while (True) :
                 depth += 1
-                best_move = self.alphabeta(game, depth)
+                best_move = self.aspiration_search(game, depth)
+                # search the best move first in the next iteration
+                self.pv_move = best_move
+                self.pv_score = self.root_score
+                self.pv_depth = depth
+                if self.stats is not None:
+                    self.stats.end_iteration(depth)
+                # deeper searches cannot change a solved game
+                if depth >= max_depth or abs(self.root_score) == float("inf"):
+                    break
+                if (time_manager is not None and
+                        not time_manager.next_iteration(best_move)):
+                    break
 
         except SearchTimeout :
             # Handle any actions required after timeout as needed
             pass
 
-        return best_move
+        return best_move, "search"
+
+    def aspiration_search(self, game, depth):
+        """Search a position with a window around the score of the previous
+        iteration, and search it again with the full window if the score
+        falls outside.
+        """
+        score = self.root_score
+        if depth > 1 and abs(score) != float("inf"):
+            alpha = score - ASPIRATION_WINDOW
+            beta = score + ASPIRATION_WINDOW
+            best_move = self.alphabeta(game, depth, alpha, beta)
+            if alpha < self.root_score < beta:
+                return best_move
+        return self.alphabeta(game, depth)
+
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         # check for timeout
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
+        tt = self.tt
+        root_depth = depth
+        timed_out = timeout_check(self.time_left, self.TIMER_THRESHOLD)
+        score_fn = self.score
+        batch = get_batch_score(score_fn)
+        stats = self.stats
+        if stats is not None:
+            score_fn = stats.timed(score_fn, "score")
+            if batch is not None:
+                batch = stats.timed(batch, "score")
+        # stored values are from the point of view of the root player, so the
+        # keys also encode which player is maximizing
+        salt = MAXIMIZER_KEYS[game.move_count % 2]
+
         # max-value function (helper function)
         def max_value(self, game, depth, alpha, beta):
             # check for timeout
-            if self.time_left() < self.TIMER_THRESHOLD:
+            if timed_out():
                 raise SearchTimeout()
-            # get the legel moves
-            valid_moves  = game.get_legal_moves()
+            if stats is not None:
+                stats.nodes += 1
+            # get the legel moves (sorted below, so no need to shuffle)
+            valid_moves  = game.get_legal_moves(shuffle=False)
             # intial the best_move by - inf to can update to the max value
             best_move = float("-inf")
             # check for the terminal state
             if (depth == 0) or (not valid_moves):
-                return self.score(game, self)
+                return score_fn(game, self)
+            # use the transposition table to cut off or narrow the window
+            key = game.hash() ^ salt
+            value, alpha, beta, tt_move = tt.probe(key, depth, alpha, beta)
+            if value is not None:
+                if stats is not None:
+                    stats.tt_hits += 1
+                return value
+            if stats is not None:
+                stats.expanded += 1
+                stats.children += len(valid_moves)
+            alpha_orig = alpha
+            ply = root_depth - depth
+            # score all the children at once above the search horizon
+            if depth == 1 and batch is not None:
+                if stats is not None:
+                    stats.nodes += len(valid_moves)
+                best_m, best_move = max(batch(game, self), key=itemgetter(1))
+                if (best_move >= beta):
+                    self.update_cutoff(game, best_m, ply, depth)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                tt.save(key, depth, best_move, alpha_orig, beta, best_m)
+                return best_move
+            best_m = None
             # loop for the valid_moves to get the best move
-            for m in valid_moves:
-                best_move = max(best_move , min_value(self, game.forecast_move(m), depth-1, alpha, beta))
+            for m in self.order_moves(game, valid_moves, ply, tt_move):
+                game.apply_move(m)
+                if best_m is None or alpha == float("-inf"):
+                    v = min_value(self, game, depth-1, alpha, beta)
+                else:
+                    # only test whether the move beats alpha, and search it
+                    # again with the full window if it does
+                    v = min_value(self, game, depth-1, alpha, alpha + NULL_WINDOW)
+                    if alpha < v < beta:
+                        v = min_value(self, game, depth-1, alpha, beta)
+                game.undo_move()
+                if v > best_move or best_m is None:
+                    best_move, best_m = v, m
                 # check for purning when best bossible value is equal or higher than beta
                 if (best_move >= beta):
-                    return best_move
+                    self.update_cutoff(game, m, ply, depth)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                    break
                 # Update alpha if best possible value is higher than alpha
                 alpha = max(best_move , alpha)
+            tt.save(key, depth, best_move, alpha_orig, beta, best_m)
             return best_move
 
         # min-value function (helper function)
         def min_value(self, game, depth, alpha, beta):
             # check for timeout
-            if self.time_left() < self.TIMER_THRESHOLD:
+            if timed_out():
                 raise SearchTimeout()
-            # get the legel moves
-            valid_moves  = game.get_legal_moves()
+            if stats is not None:
+                stats.nodes += 1
+            # get the legel moves (sorted below, so no need to shuffle)
+            valid_moves  = game.get_legal_moves(shuffle=False)
             # intial the best_move by  + inf to can update to the min value
             best_move = float("inf")
             # check for the terminal state
             if (depth == 0) or (not valid_moves):
-                return self.score(game, self)
+                return score_fn(game, self)
+            # use the transposition table to cut off or narrow the window
+            key = game.hash() ^ salt
+            value, alpha, beta, tt_move = tt.probe(key, depth, alpha, beta)
+            if value is not None:
+                if stats is not None:
+                    stats.tt_hits += 1
+                return value
+            if stats is not None:
+                stats.expanded += 1
+                stats.children += len(valid_moves)
+            beta_orig = beta
+            ply = root_depth - depth
+            # score all the children at once above the search horizon
+            if depth == 1 and batch is not None:
+                if stats is not None:
+                    stats.nodes += len(valid_moves)
+                best_m, best_move = min(batch(game, self), key=itemgetter(1))
+                if (best_move <= alpha):
+                    self.update_cutoff(game, best_m, ply, depth)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                tt.save(key, depth, best_move, alpha, beta_orig, best_m)
+                return best_move
+            best_m = None
             # loop for the valid_moves to get the best move
-            for m in valid_moves:
-                best_move = min(best_move , max_value(self, game.forecast_move(m), depth-1, alpha, beta))
+            for m in self.order_moves(game, valid_moves, ply, tt_move):
+                game.apply_move(m)
+                if best_m is None or beta == float("inf"):
+                    v = max_value(self, game, depth-1, alpha, beta)
+                else:
+                    # only test whether the move is below beta, and search it
+                    # again with the full window if it is
+                    v = max_value(self, game, depth-1, beta - NULL_WINDOW, beta)
+                    if alpha < v < beta:
+                        v = max_value(self, game, depth-1, alpha, beta)
+                game.undo_move()
+                if v < best_move or best_m is None:
+                    best_move, best_m = v, m
                 # check for purning when best bossible value is equal or higher than alpha
                 if (best_move <= alpha):
-                    return best_move
+                    self.update_cutoff(game, m, ply, depth)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                    break
                 # Update beta if best possible value is higher than beta
                 beta = min(best_move , beta)
+            tt.save(key, depth, best_move, alpha, beta_orig, best_m)
             return best_move
         # Main alphabeta function
+        # search a private copy in place with apply_move/undo_move, so that a
+        # timeout cannot leave the caller's board modified
+        game = game.copy()
+        if stats is not None:
+            # time the move generation of the private copy only
+            game.get_legal_moves = stats.timed(game.get_legal_moves, "movegen")
+            stats.nodes += 1
         # get legel moves
-        valid_moves = game.get_legal_moves()
+        valid_moves = game.get_legal_moves(shuffle=False)
+        if self.root_moves is not None:
+            valid_moves = [m for m in valid_moves if m in self.root_moves]
         # intial best_move, best_score
         best_move = (-1, -1)
         best_score = float("-inf")
+        self.root_score = best_score
         # check for terminal state
         if (depth == 0) or (not valid_moves):
             return best_move
-
-        for m in valid_moves:
-            v = min_value(self, game.forecast_move(m), depth -1, alpha, beta)
+        if stats is not None:
+            stats.expanded += 1
+            stats.children += len(valid_moves)
+
+        # search the best move of the previous iteration first, or else the
+        # best move of the previous search of this position
+        key = game.hash() ^ salt
+        entry = tt.lookup(key)
+        first_move = entry[4] if entry is not None else None
+        if self.pv_move in valid_moves:
+            first_move = self.pv_move
+        valid_moves = self.order_moves(game, valid_moves, 0, first_move)
+        alpha_orig = alpha
+
+        # default to the first move, so that a legal move is returned even if
+        # every move loses
+        best_move = valid_moves[0]
+        for i, m in enumerate(valid_moves):
+            game.apply_move(m)
+            if i == 0 or alpha == float("-inf"):
+                v = min_value(self, game, depth -1, alpha, beta)
+            else:
+                # principal variation search, as in max_value()
+                v = min_value(self, game, depth -1, alpha, alpha + NULL_WINDOW)
+                if alpha < v < beta:
+                    v = min_value(self, game, depth -1, alpha, beta)
+            game.undo_move()
             if (v > best_score):
                 best_score = v
                 best_move = m
                 alpha = max(alpha, v)
                 if (best_score >= beta):
-                    return best_move
-
+                    self.update_cutoff(game, m, 0, depth)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                    break
+
+        # the stored entry is only valid for a search of all the root moves
+        if self.root_moves is None:
+            tt.save(key, depth, best_score, alpha_orig, beta, best_move)
+        self.root_score = best_score
         return best_move
@@ -0,0 +1,199 @@
+"""Compact binary log of Isolation games.
+
+Games are appended to a log file one record at a time, read back as a stream
+(one record in memory at a time), and replayed on a `Board` without running
+the agents again, so that millions of games can be stored and analyzed:
+
+    with GameRecordWriter("games.bin") as writer:
+        writer.write(GameRecord(("AB_Custom", "AB_Improved"), 7, 7, moves, 2,
+                                winner, "timeout", seed))
+
+    for record in read_records("games.bin"):
+        for game, move in replay(record):
+            ...
+
+The file starts with a magic string, followed by the records. Each record is
+a fixed header (board width and height, index of the winner, termination,
+random seed, number of opening moves and total number of moves), the names
+of the two players (UTF-8, prefixed by their length), and the cell index of
+every move: one byte per move on boards of up to 256 cells, two bytes on
+larger boards. A 7x7 game of 30 moves between two agents with ten-character
+names takes 68 bytes.
+
+Print a summary of a log with:
+
+    python game_records.py games.bin
+"""
+import argparse
+import struct
+
+from array import array
+from collections import OrderedDict, namedtuple
+
+from isolation import Board
+from isolation.isolation import get_move_tables
+
+LOG_MAGIC = b"ISOGAME1"
+RECORD_FORMAT = "<BBBBqHH"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+# Reasons a game ends, as returned by Board.play(), by termination code
+TERMINATIONS = ("illegal move", "timeout", "forfeit")
+
+# A finished game. `players` are the names of the first and second player,
+# `moves` the (row, column) of every move including the first
+# `opening_plies` moves applied before the agents started playing, `winner`
+# the index of the winner in `players`, and `seed` the seed of the random
+# number generator of the game (or None).
+GameRecord = namedtuple("GameRecord", ["players", "width", "height", "moves",
+                                       "opening_plies", "winner",
+                                       "termination", "seed"])
+
+
+def move_typecode(width, height):
+    """Return the array typecode of the cell indices of a board size."""
+    return "B" if width * height <= 256 else "H"
+
+
+class GameRecordWriter(object):
+    """Append game records to a log file, creating it if needed.
+
+    Parameters
+    ----------
+    path : str
+        The log file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(LOG_MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the log file."""
+        self._file.close()
+
+    def write(self, record):
+        """Append a `GameRecord` to the log."""
+        height = record.height
+        seed = -1 if record.seed is None else record.seed
+        names = [name.encode("utf-8") for name in record.players]
+        data = [struct.pack(RECORD_FORMAT, record.width, height,
+                            record.winner,
+                            TERMINATIONS.index(record.termination), seed,
+                            record.opening_plies, len(record.moves))]
+        for name in names:
+            data.append(struct.pack("<B", len(name)))
+            data.append(name)
+        data.append(array(move_typecode(record.width, height),
+                          [row + col * height
+                           for row, col in record.moves]).tobytes())
+        self._file.write(b"".join(data))
+
+
+def _read(log_file, size):
+    """Read exactly `size` bytes of a log file."""
+    data = log_file.read(size)
+    if len(data) < size:
+        raise RuntimeError("Truncated record in {}.".format(log_file.name))
+    return data
+
+
+def read_records(path):
+    """Iterate over the game records of a log file, reading one record at a
+    time.
+    """
+    with open(path, "rb") as log_file:
+        if log_file.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise RuntimeError("{} is not a game log.".format(path))
+        while True:
+            if not log_file.peek(1):
+                return
+            (width, height, winner, termination, seed, opening_plies,
+             num_moves) = struct.unpack(RECORD_FORMAT,
+                                        _read(log_file, RECORD_SIZE))
+            players = []
+            for _ in range(2):
+                length = _read(log_file, 1)[0]
+                players.append(_read(log_file, length).decode("utf-8"))
+            indices = array(move_typecode(width, height))
+            indices.frombytes(_read(log_file, num_moves * indices.itemsize))
+            # the (row, column) of every cell of the board size
+            cells = get_move_tables(width, height)[2]
+            yield GameRecord(tuple(players), width, height,
+                             [cells[idx] for idx in indices], opening_plies,
+                             winner, TERMINATIONS[termination],
+                             None if seed < 0 else seed)
+
+
+def replay(record):
+    """Replay a game, yielding the position before each move and the move.
+
+    The same board is updated in place after each move, with the names of
+    the players registered as the players; copy it to keep a position.
+    """
+    game = Board(record.players[0], record.players[1], record.width,
+                 record.height)
+    for move in record.moves:
+        yield game, move
+        game.apply_move(move)
+
+
+def final_position(record):
+    """Return the board at the end of a game."""
+    game = Board(record.players[0], record.players[1], record.width,
+                 record.height)
+    for move in record.moves:
+        game.apply_move(move)
+    return game
+
+
+def summarize(records):
+    """Count the games, wins, terminations and moves of each pair of players.
+
+    Returns
+    -------
+    dict
+        For each (first player, second player) pair, the number of games,
+        the number of wins of each player, the number of games ended by each
+        termination, and the mean number of moves.
+    """
+    summary = OrderedDict()
+    for record in records:
+        stats = summary.setdefault(record.players, OrderedDict([
+            ("games", 0), ("wins", [0, 0]),
+            ("terminations", OrderedDict((t, 0) for t in TERMINATIONS)),
+            ("moves", 0)]))
+        stats["games"] += 1
+        stats["wins"][record.winner] += 1
+        stats["terminations"][record.termination] += 1
+        stats["moves"] += len(record.moves)
+    for stats in summary.values():
+        stats["moves"] /= stats["games"]
+    return summary
+
+
+def format_summary(summary):
+    """Return the result of `summarize()` as a text table."""
+    lines = ["{:<14}{:<14}{:>7}{:>7}{:>7}{:>9}{:>9}{:>7}".format(
+        "Player 1", "Player 2", "Games", "Won 1", "Won 2", "Timeout",
+        "Forfeit", "Moves")]
+    for (player_1, player_2), stats in summary.items():
+        lines.append("{:<14}{:<14}{:>7}{:>7}{:>7}{:>9}{:>9}{:>7.1f}".format(
+            player_1, player_2, stats["games"], stats["wins"][0],
+            stats["wins"][1], stats["terminations"]["timeout"],
+            stats["terminations"]["forfeit"], stats["moves"]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a game log.")
+    parser.add_argument('path', help="The game log file.")
+    args = parser.parse_args()
+    print(format_summary(summarize(read_records(args.path))))
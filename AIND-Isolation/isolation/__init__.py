@@ -8,4 +8,4 @@ legal moves loses, and the opponent is declared the winner.
 """
 
 # Make the Board class available at the root of the module for imports
-from .isolation import Board
+from .isolation import Board, Deadline, PLAYER_1, PLAYER_2
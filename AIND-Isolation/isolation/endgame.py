@@ -0,0 +1,147 @@
+"""
+This file contains an exact solver for Isolation endgames in which the
+players have been separated (see `Board.is_partitioned()`).
+
+Once no blank cell can be reached by both players, the moves of one player
+no longer affect the other, and each player can only try to make as many
+moves as possible in their own region. The player to move wins if and only
+if their longest path is strictly longer than the longest path of their
+opponent, so the game reduces to two independent longest-path problems on
+the knight graph of each region, which are solved with a memoized
+depth-first search over (location, open cells) states.
+"""
+from .isolation import popcount
+
+
+class EndgameTimeout(Exception):
+    """Raised when the solver runs out of time before finishing."""
+    pass
+
+
+class EndgameSolver(object):
+    """Solve partitioned Isolation positions exactly.
+
+    The longest path of every (location, open cells) state searched is kept
+    in a memo that persists across calls, so the subproblems solved on one
+    turn are reused on the next ones.
+
+    Parameters
+    ----------
+    time_left : callable (optional)
+        A function that returns the number of milliseconds left in the
+        current turn. If None, the solver runs until it finishes.
+
+    threshold : float (optional)
+        The solver raises EndgameTimeout when time_left() falls below this
+        value.
+
+    max_entries : int (optional)
+        The memo is cleared when it holds more than this number of states.
+    """
+    # Number of searched states between two checks of the timer
+    CHECK_INTERVAL = 256
+
+    def __init__(self, time_left=None, threshold=0., max_entries=2**18):
+        self.time_left = time_left
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._memo = {}
+        self._neighbors = None
+        self._nodes = 0
+
+    def longest_path(self, loc, open_mask, target=None):
+        """Return the largest number of moves a knight at cell index `loc`
+        can make through the cells of `open_mask`.
+
+        If `target` is given, the search stops as soon as a path of `target`
+        moves is found, and returns a length of at least `target` that may
+        be shorter than the longest path. Lengths below `target` are exact.
+        """
+        key = (loc, open_mask)
+        memo = self._memo
+        if key in memo:
+            return memo[key]
+
+        self._nodes += 1
+        if (self.time_left is not None and
+                self._nodes % self.CHECK_INTERVAL == 0 and
+                self.time_left() < self.threshold):
+            raise EndgameTimeout()
+
+        # the path cannot be longer than the number of open cells
+        bound = popcount(open_mask)
+        limit = bound if target is None else min(bound, target)
+        child_target = None if target is None else target - 1
+        best = 0
+        moves = self._neighbors[loc] & open_mask
+        while moves and best < limit:
+            bit = moves & -moves
+            moves ^= bit
+            length = 1 + self.longest_path(bit.bit_length() - 1,
+                                           open_mask ^ bit, child_target)
+            if length > best:
+                best = length
+        # only exact lengths are memoized
+        if best < limit or best == bound:
+            memo[key] = best
+        return best
+
+    def best_path(self, game, loc, region, target=None):
+        """Return the legal move of the active player (at cell index `loc`)
+        with the longest path through `region`, and the length of that path
+        counting the move itself (see longest_path() for `target`).
+        """
+        best_move, best_length = (-1, -1), 0
+        for move in game.get_legal_moves(shuffle=False):
+            idx = move[0] + move[1] * game.height
+            length = 1 + self.longest_path(
+                idx, region ^ (1 << idx),
+                None if target is None else target - 1)
+            if length > best_length:
+                best_move, best_length = move, length
+                if target is not None and length >= target:
+                    break
+        return best_move, best_length
+
+    def solve(self, game):
+        """Find the best move of the active player in a partitioned game.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            A game state where `game.is_partitioned()` is True.
+
+        Returns
+        -------
+        ((int, int), float)
+            The move that leaves the active player the longest path (or
+            (-1, -1) if there are no legal moves), and the utility of the
+            game for the active player: +inf if they win, -inf otherwise.
+        """
+        if not game.is_partitioned():
+            raise RuntimeError("The players of the game are not separated.")
+        # the memoized states are only valid for boards of the same size
+        if (len(self._memo) > self.max_entries or
+                self._neighbors is not game._neighbors):
+            self._memo = {}
+        self._neighbors = game._neighbors
+
+        def index(move):
+            return move[0] + move[1] * game.height
+
+        loc = index(game.get_player_location(game.active_player))
+        opp_loc = index(game.get_player_location(game.inactive_player))
+        region = game._reachable_mask(loc)
+        opp_region = game._reachable_mask(opp_loc)
+
+        # solve the smaller region exactly first, then only search the other
+        # region until a path long enough to decide the game is found
+        if popcount(region) <= popcount(opp_region):
+            best_move, length = self.best_path(game, loc, region)
+            won = self.longest_path(opp_loc, opp_region, length) < length
+        else:
+            opp_length = self.longest_path(opp_loc, opp_region)
+            best_move, length = self.best_path(game, loc, region,
+                                               opp_length + 1)
+            won = length > opp_length
+        return best_move, float("inf") if won else float("-inf")
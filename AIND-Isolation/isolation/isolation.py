@@ -9,10 +9,237 @@ be available to project reviewers.
 """
 import random
 import timeit
-from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# Placeholder players registered on boards that are not played by agents
+# (e.g., positions sent to worker processes, or built for analysis)
+PLAYER_1 = "player 1"
+PLAYER_2 = "player 2"
+
+class Deadline(object):
+    """The time limit of a turn, handed to the players by Board.play().
+
+    A Deadline is called like the `time_left` functions that players have
+    always received: it returns the number of milliseconds left in the turn,
+    so agents that only call time_left() keep working unchanged. It also
+    stores the end of the turn as an absolute time on the monotonic
+    `timeit.default_timer()` clock, and provides expired(), a timeout check
+    for search loops that only reads the clock once every `interval` calls,
+    so the cost of checking the timer at every node is small and constant.
+
+    Parameters
+    ----------
+    time_limit : numeric
+        The number of milliseconds from now until the end of the turn.
+
+    interval : int (optional)
+        The number of calls to expired() between two reads of the clock.
+    """
+    def __init__(self, time_limit, interval=16):
+        self.deadline = timeit.default_timer() + time_limit / 1000.
+        self.interval = interval
+        self.clock_reads = 0
+        self._countdown = interval
+
+    def __call__(self):
+        """Return the number of milliseconds left before the deadline."""
+        self.clock_reads += 1
+        return 1000 * (self.deadline - timeit.default_timer())
+
+    def expired(self, margin=0.):
+        """Return True if fewer than `margin` milliseconds are left.
+
+        Only every `interval`-th call reads the clock; the other calls
+        return False, so the result may come up to `interval` calls late.
+        Call the deadline itself for an exact check.
+        """
+        self._countdown -= 1
+        if self._countdown:
+            return False
+        self._countdown = self.interval
+        return self() < margin
+
+
+def popcount(mask):
+    """Return the number of bits set in a bitboard."""
+    return bin(mask).count("1")
+
+
+# int.bit_count() (Python 3.10+) counts the bits of large boards much faster
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+
+
+def mask_indices(mask):
+    """Return the indices of the bits set in a bitboard, in increasing order.
+
+    The mask is converted to a string once, which scales to large boards
+    much better than testing every cell with a shift of the whole mask.
+    """
+    return [idx for idx, bit in enumerate(bin(mask)[:1:-1]) if bit == "1"]
+
+
+# Offsets (row, column) of the eight L-shaped moves of a knight
+KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                     (1, -2), (1, 2), (2, -1), (2, 1)]
+
+# Cache of knight move tables shared by every board with the same size
+_MOVE_TABLES = {}
+
+
+def get_move_tables(width, height):
+    """Return the precomputed knight move tables for a board size.
+
+    The tables are built once per (width, height) pair and shared by every
+    board of that size, so they must not be modified.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    (list<tuple<(int, (int, int))>>, list<int>, list<(int, int)>)
+        For each cell index, a tuple of the (cell index, (row, column)) pairs
+        reachable with a knight move, the bitmask of those cells, and the
+        (row, column) of the cell.
+    """
+    key = (width, height)
+    if key not in _MOVE_TABLES:
+        moves = []
+        masks = []
+        cells = [(idx % height, idx // height) for idx in range(width * height)]
+        for idx in range(width * height):
+            r, c = idx % height, idx // height
+            cell_moves = tuple((r + dr + (c + dc) * height, (r + dr, c + dc))
+                               for dr, dc in KNIGHT_DIRECTIONS
+                               if 0 <= r + dr < height and 0 <= c + dc < width)
+            moves.append(cell_moves)
+            masks.append(sum(1 << n for n, _ in cell_moves))
+        _MOVE_TABLES[key] = (moves, masks, cells)
+    return _MOVE_TABLES[key]
+
+
+# Cache of symmetry permutations shared by every board with the same size
+_SYMMETRIES = {}
+
+
+def get_symmetries(width, height):
+    """Return the symmetries of a board size as permutations of cell indices.
+
+    Knight moves are preserved by the rotations and reflections of the board,
+    so every symmetric image of a position has the same game value. Square
+    boards have eight symmetries; other boards only have four (identity,
+    horizontal and vertical reflections, and half turn). The identity is
+    always the first permutation.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    list<list<int>>
+        For each symmetry, the index of the image of each cell index.
+    """
+    key = (width, height)
+    if key not in _SYMMETRIES:
+        h, w = height - 1, width - 1
+        transforms = [lambda r, c: (r, c),
+                      lambda r, c: (h - r, c),
+                      lambda r, c: (r, w - c),
+                      lambda r, c: (h - r, w - c)]
+        if width == height:
+            transforms += [lambda r, c: (c, r),
+                           lambda r, c: (c, h - r),
+                           lambda r, c: (w - c, r),
+                           lambda r, c: (w - c, h - r)]
+        symmetries = []
+        for transform in transforms:
+            perm = []
+            for idx in range(width * height):
+                r, c = transform(idx % height, idx // height)
+                perm.append(r + c * height)
+            symmetries.append(perm)
+        _SYMMETRIES[key] = symmetries
+    return _SYMMETRIES[key]
+
+
+# Cache of the Zobrist keys of the symmetric images of each cell
+_SYMMETRIC_KEYS = {}
+
+
+def get_symmetric_zobrist_keys(width, height):
+    """Return, for each symmetry of a board size, the Zobrist keys of the image
+    of every cell, i.e., the keys of `get_zobrist_keys()` permuted by the
+    symmetries of `get_symmetries()`, along with the inverse permutation.
+
+    Returns
+    -------
+    list<(list<int>, (list<int>, list<int>), list<int>)>
+        For each symmetry: the blocked cell keys and the keys of the location
+        of each player indexed by the original cell, and the inverse
+        permutation of cell indices.
+    """
+    key = (width, height)
+    if key not in _SYMMETRIC_KEYS:
+        blocked_keys, location_keys, _ = get_zobrist_keys(width, height)
+        tables = []
+        for perm in get_symmetries(width, height):
+            inverse = [0] * len(perm)
+            for idx, image in enumerate(perm):
+                inverse[image] = idx
+            tables.append(([blocked_keys[i] for i in perm],
+                           tuple([keys[i] for i in perm] for keys in location_keys),
+                           inverse))
+        _SYMMETRIC_KEYS[key] = tables
+    return _SYMMETRIC_KEYS[key]
+
+
+# Cache of Zobrist keys shared by every board with the same size
+_ZOBRIST_KEYS = {}
+
+
+def get_zobrist_keys(width, height):
+    """Return the Zobrist hashing keys for a board size.
+
+    The keys are 64-bit random integers drawn from a generator seeded with
+    the board size, so hashes are identical across processes and runs.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns of the board.
+
+    height : int
+        The number of rows of the board.
+
+    Returns
+    -------
+    (list<int>, (list<int>, list<int>), int)
+        The key of each blocked cell, the keys of each cell for the location
+        of player 1 and player 2, and the key xored in when player 2 holds
+        the initiative.
+    """
+    key = (width, height)
+    if key not in _ZOBRIST_KEYS:
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        size = width * height
+        blocked_keys = [rng.getrandbits(64) for _ in range(size)]
+        location_keys = ([rng.getrandbits(64) for _ in range(size)],
+                         [rng.getrandbits(64) for _ in range(size)])
+        _ZOBRIST_KEYS[key] = (blocked_keys, location_keys, rng.getrandbits(64))
+    return _ZOBRIST_KEYS[key]
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -46,14 +273,133 @@ class Board(object):
         self._active_player = player_1
         self._inactive_player = player_2
 
-        # The last 3 entries of the board state includes initiative (0 for
-        # player 1, 1 for player 2) player 2 last move, and player 1 last move
-        self._board_state = [Board.BLANK] * (width * height + 3)
-        self._board_state[-1] = Board.NOT_MOVED
-        self._board_state[-2] = Board.NOT_MOVED
+        # The board is stored as a bitboard: bit `idx` of `_blocked` is set
+        # once the cell with index `idx = row + col * height` is occupied.
+        # Player locations are stored as cell indices (or NOT_MOVED), and the
+        # initiative is 0 when player 1 is active and 1 for player 2.
+        self._blocked = 0
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
+        self._initiative = 0
+        self._full_mask = (1 << (width * height)) - 1
+        self._moves, self._neighbors, self._cells = get_move_tables(width,
+                                                                    height)
+
+        # Zobrist hash of the position, updated incrementally by apply_move()
+        # and undo_move()
+        self._zobrist = get_zobrist_keys(width, height)
+        self._hash = 0
+
+        # Previous location of the moving player for each applied move, which
+        # is all the state needed to reverse it with undo_move()
+        self._undo_stack = []
+
+    @property
+    def _board_state(self):
+        """Legacy list encoding of the board (one entry per cell followed by
+        the initiative, player 2 last move, and player 1 last move). This is
+        rebuilt on every access, so it should not be used during search.
+        """
+        state = [Board.BLANK] * (self.width * self.height + 3)
+        for idx in range(self.width * self.height):
+            if self._blocked >> idx & 1:
+                state[idx] = 1
+        state[-3] = self._initiative
+        state[-2] = self._p2_loc
+        state[-1] = self._p1_loc
+        return state
 
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return the 64-bit Zobrist hash of the current position (blocked
+        cells, player locations and initiative). Boards of the same size in
+        the same position always have the same hash.
+        """
+        return self._hash
+
+    def symmetric_hashes(self):
+        """Return the Zobrist hash of each symmetric image of the position.
+
+        The hashes are computed from the bitboard with the per-symmetry key
+        tables of `get_symmetric_zobrist_keys()`, iterating once over the
+        blocked cells; the identity image is the incremental hash().
+
+        Returns
+        -------
+        list<int>
+            The hash of the image of the position under each symmetry of
+            `get_symmetries()` (four on rectangular boards, eight on square
+            boards), starting with the identity.
+        """
+        tables = get_symmetric_zobrist_keys(self.width, self.height)
+        cells = []
+        mask = self._blocked
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            cells.append(bit.bit_length() - 1)
+        initiative_hash = self._zobrist[2] if self._initiative else 0
+
+        hashes = [self._hash]
+        for blocked_keys, (p1_keys, p2_keys), _ in tables[1:]:
+            h = initiative_hash
+            for idx in cells:
+                h ^= blocked_keys[idx]
+            if self._p1_loc is not Board.NOT_MOVED:
+                h ^= p1_keys[self._p1_loc]
+            if self._p2_loc is not Board.NOT_MOVED:
+                h ^= p2_keys[self._p2_loc]
+            hashes.append(h)
+        return hashes
+
+    def canonical_hash(self):
+        """Return a hash shared by all the symmetric images of the position
+        (the smallest of their hashes), and the index of the symmetry that
+        maps this board to the image with that hash. Moves can be converted
+        between the two boards with transform_move().
+
+        Returns
+        -------
+        (int, int)
+            The canonical hash and the index of the symmetry.
+        """
+        hashes = self.symmetric_hashes()
+        key = min(hashes)
+        return key, hashes.index(key)
+
+    def transform_move(self, move, symmetry, inverse=False):
+        """Return the image of a move under one of the board symmetries (or
+        under its inverse).
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) on the board.
+
+        symmetry : int
+            The index of the symmetry, e.g., as returned by canonical_hash().
+
+        inverse : bool (optional)
+            Map the move back from the image board to this board instead.
+        """
+        if inverse:
+            perm = get_symmetric_zobrist_keys(self.width, self.height)[symmetry][2]
+        else:
+            perm = get_symmetries(self.width, self.height)[symmetry]
+        idx = perm[move[0] + move[1] * self.height]
+        return (idx % self.height, idx // self.height)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, Board):
+            return NotImplemented
+        return (self._hash == other._hash and
+                self._blocked == other._blocked and
+                self._p1_loc == other._p1_loc and
+                self._p2_loc == other._p2_loc and
+                self._initiative == other._initiative and
+                self.width == other.width and self.height == other.height)
 
     @property
     def active_player(self):
@@ -92,13 +438,112 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        # The state is made of immutable ints, so the copy bypasses __init__
+        # and shares nothing mutable with the original board
+        new_board = Board.__new__(Board)
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
-        new_board._board_state = copy(self._board_state)
+        new_board._blocked = self._blocked
+        new_board._p1_loc = self._p1_loc
+        new_board._p2_loc = self._p2_loc
+        new_board._initiative = self._initiative
+        new_board._full_mask = self._full_mask
+        new_board._moves = self._moves
+        new_board._neighbors = self._neighbors
+        new_board._cells = self._cells
+        new_board._zobrist = self._zobrist
+        new_board._hash = self._hash
+        new_board._undo_stack = []
         return new_board
 
+    def copy_with_players(self, player_1, player_2):
+        """Return a copy of the current board with the registered players
+        replaced by other objects (e.g., to search the position with different
+        agents, or to send it to another process without the player objects).
+        """
+        new_board = self.copy()
+        new_board._player_1 = player_1
+        new_board._player_2 = player_2
+        if self._initiative:
+            new_board._active_player, new_board._inactive_player = player_2, player_1
+        else:
+            new_board._active_player, new_board._inactive_player = player_1, player_2
+        return new_board
+
+    def copy_with_active_player(self, player):
+        """Return a copy of the current board with `player` registered as the
+        active player, and the PLAYER_1 or PLAYER_2 placeholder as their
+        opponent (e.g., to search the position with an agent).
+        """
+        if self._initiative:
+            return self.copy_with_players(PLAYER_1, player)
+        return self.copy_with_players(player, PLAYER_2)
+
+    def get_position(self):
+        """Return the compact state of the position: the bitboard of the
+        blocked cells (bit `row + col * height` is set when the cell is
+        blocked) and the cell index of the location of each player, or
+        NOT_MOVED. The active player follows from the number of blocked
+        cells. See set_position().
+
+        Returns
+        -------
+        (int, int, int)
+            The blocked cells, and the location of player 1 and player 2.
+        """
+        return self._blocked, self._p1_loc, self._p2_loc
+
+    def set_position(self, position):
+        """Set the board to a position returned by get_position() on a board
+        of the same size (e.g., to rebuild positions stored in compact form).
+        The moves applied before can no longer be undone.
+        """
+        blocked, p1_loc, p2_loc = position
+        blocked_keys, location_keys, initiative_key = self._zobrist
+        h = 0
+        mask = blocked
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            h ^= blocked_keys[bit.bit_length() - 1]
+        if p1_loc != Board.NOT_MOVED:
+            h ^= location_keys[0][p1_loc]
+        if p2_loc != Board.NOT_MOVED:
+            h ^= location_keys[1][p2_loc]
+        self.move_count = popcount(blocked)
+        self._initiative = self.move_count % 2
+        if self._initiative:
+            h ^= initiative_key
+            self._active_player = self._player_2
+            self._inactive_player = self._player_1
+        else:
+            self._active_player = self._player_1
+            self._inactive_player = self._player_2
+        self._blocked = blocked
+        self._p1_loc = p1_loc
+        self._p2_loc = p2_loc
+        self._hash = h
+        self._undo_stack = []
+
+    def __getstate__(self):
+        # The move tables and Zobrist keys are shared by all boards of the
+        # same size, so they are rebuilt from the cache instead of pickled
+        state = self.__dict__.copy()
+        del state['_moves'], state['_neighbors'], state['_cells']
+        del state['_zobrist']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._moves, self._neighbors, self._cells = get_move_tables(
+            self.width, self.height)
+        self._zobrist = get_zobrist_keys(self.width, self.height)
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -134,13 +579,14 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
-                self._board_state[idx] == Board.BLANK)
+                not self._blocked >> idx & 1)
 
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-                if self._board_state[i + j * self.height] == Board.BLANK]
+        cells = self._cells
+        return [cells[idx]
+                for idx in mask_indices(self._full_mask & ~self._blocked)]
 
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
@@ -157,21 +603,19 @@ class Board(object):
             if the player has not moved.
         """
         if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
+            idx = self._p1_loc
         elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
+            idx = self._p2_loc
         else:
             raise RuntimeError(
                 "Invalid player in get_player_location: {}".format(player))
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
         w = idx // self.height
         h = idx % self.height
         return (h, w)
 
-    def get_legal_moves(self, player=None):
+    def get_legal_moves(self, player=None, shuffle=True):
         """Return the list of all legal moves for the specified player.
 
         Parameters
@@ -180,6 +624,11 @@ class Board(object):
             An object registered as a player in the current game. If None,
             return the legal moves for the active player on the board.
 
+        shuffle : bool (optional)
+            Randomize the order of the moves. Search code that applies its
+            own move ordering can skip the shuffle by passing False, in which
+            case the moves are returned in a fixed order.
+
         Returns
         -------
         list<(int, int)>
@@ -187,8 +636,172 @@ class Board(object):
             for the player constrained by the current game state.
         """
         if player is None:
-            player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+            player = self._active_player
+        valid_moves = self.__get_moves(self.__location_index(player))
+        if shuffle:
+            random.shuffle(valid_moves)
+        return valid_moves
+
+    def count_legal_moves(self, player=None):
+        """Return the number of legal moves for the specified player, without
+        building the list of moves.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            count the legal moves of the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of legal moves of the player.
+        """
+        if player is None:
+            player = self._active_player
+        loc = self.__location_index(player)
+        if loc == Board.NOT_MOVED:
+            return popcount(self._full_mask & ~self._blocked)
+        return popcount(self._neighbors[loc] & ~self._blocked)
+
+    def get_move_mobilities(self):
+        """Return the number of legal moves of both players after each legal
+        move of the active player, computed from the neighbor masks in one
+        pass instead of applying each move.
+
+        Returns
+        -------
+        list<((int, int), int, int)>
+            For each legal move of the active player: the move, the number of
+            legal moves the active player has after making it, and the number
+            of legal moves of the inactive player after it.
+        """
+        blocked = self._blocked
+        neighbors = self._neighbors
+        if self._initiative:
+            loc, other_loc = self._p2_loc, self._p1_loc
+        else:
+            loc, other_loc = self._p1_loc, self._p2_loc
+
+        if loc == Board.NOT_MOVED:
+            cells = self._cells
+            moves = [(idx, cells[idx])
+                     for idx in mask_indices(self._full_mask & ~blocked)]
+        else:
+            moves = [(idx, move) for idx, move in self._moves[loc]
+                     if not blocked >> idx & 1]
+
+        if other_loc == Board.NOT_MOVED:
+            other_mask = self._full_mask
+        else:
+            other_mask = neighbors[other_loc]
+        other_count = popcount(other_mask & ~blocked)
+
+        mobilities = []
+        for idx, move in moves:
+            bit = 1 << idx
+            mobilities.append((move,
+                               popcount(neighbors[idx] & ~(blocked | bit)),
+                               other_count - (1 if other_mask & bit else 0)))
+        return mobilities
+
+    def _reachable_mask(self, loc):
+        """Return the bitmask of the blank cells that a knight at cell index
+        `loc` can reach in any number of moves through blank cells.
+        """
+        open_mask = self._full_mask & ~self._blocked
+        if loc == Board.NOT_MOVED:
+            return open_mask
+        neighbors = self._neighbors
+        reached = 0
+        frontier = neighbors[loc] & open_mask
+        while frontier:
+            reached |= frontier
+            expanded = 0
+            while frontier:
+                bit = frontier & -frontier
+                frontier ^= bit
+                expanded |= neighbors[bit.bit_length() - 1]
+            frontier = expanded & open_mask & ~reached
+        return reached
+
+    def get_reachable_cells(self, player=None):
+        """Return the list of blank cells the specified player can reach in
+        any number of moves, assuming the opponent does not block any cell.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            use the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) reachable by the player.
+        """
+        if player is None:
+            player = self._active_player
+        mask = self._reachable_mask(self.__location_index(player))
+        cells = self._cells
+        return [cells[idx] for idx in mask_indices(mask)]
+
+    def is_partitioned(self):
+        """Test whether the players can no longer interact, i.e., both players
+        are on the board and no blank cell can be reached by both of them.
+        From then on each player can only maximize the length of their own
+        path, and the game can be solved exactly.
+        """
+        if self._p1_loc == Board.NOT_MOVED or self._p2_loc == Board.NOT_MOVED:
+            return False
+        return not (self._reachable_mask(self._p1_loc) &
+                    self._reachable_mask(self._p2_loc))
+
+    def random_playout(self, rng=random):
+        """Play uniformly random moves for both players from the current
+        state until one of them has no legal moves, and return the winner.
+
+        The playout runs on the bitboard alone (no moves are applied to the
+        board, which is left unchanged), e.g., for Monte Carlo rollouts.
+
+        Parameters
+        ----------
+        rng : random.Random (optional)
+            The random number generator used to pick the moves.
+
+        Returns
+        -------
+        object
+            The registered player that wins the playout.
+        """
+        neighbors = self._neighbors
+        open_mask = self._full_mask & ~self._blocked
+        locs = [self._p1_loc, self._p2_loc]
+        turn = self._initiative
+        uniform = rng.random
+        while True:
+            loc = locs[turn]
+            if loc == Board.NOT_MOVED:
+                # any blank cell, which may be hundreds on large boards
+                blanks = mask_indices(open_mask)
+                if not blanks:
+                    break
+                locs[turn] = blanks[int(uniform() * len(blanks))]
+                open_mask ^= 1 << locs[turn]
+                turn ^= 1
+                continue
+            moves = neighbors[loc] & open_mask
+            if not moves:
+                break
+            # drop a random number of the lowest bits to pick a random move
+            for _ in range(int(uniform() * popcount(moves))):
+                moves &= moves - 1
+            bit = moves & -moves
+            open_mask ^= bit
+            locs[turn] = bit.bit_length() - 1
+            turn ^= 1
+        # the player to move has no legal moves and loses
+        return self._player_1 if turn else self._player_2
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -200,20 +813,59 @@ class Board(object):
             the active player on the board.
         """
         idx = move[0] + move[1] * self.height
-        last_move_idx = int(self.active_player == self._player_2) + 1
-        self._board_state[-last_move_idx] = idx
-        self._board_state[idx] = 1
-        self._board_state[-3] ^= 1
+        blocked_keys, location_keys, initiative_key = self._zobrist
+        loc_keys = location_keys[self._initiative]
+        if self._initiative:
+            prev_loc = self._p2_loc
+            self._p2_loc = idx
+        else:
+            prev_loc = self._p1_loc
+            self._p1_loc = idx
+        self._undo_stack.append(prev_loc)
+        h = self._hash ^ blocked_keys[idx] ^ loc_keys[idx] ^ initiative_key
+        if prev_loc is not Board.NOT_MOVED:
+            h ^= loc_keys[prev_loc]
+        self._hash = h
+        self._blocked |= 1 << idx
+        self._initiative ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def undo_move(self):
+        """Reverse the last move applied to this board with apply_move(),
+        restoring the previous location of the player that made it and
+        returning the initiative to that player.
+
+        Only moves applied to this board object can be undone; a board
+        returned by copy() or forecast_move() starts with no undo history.
+        """
+        if not self._undo_stack:
+            raise RuntimeError("There is no move to undo on this board.")
+        prev_loc = self._undo_stack.pop()
+        self._initiative ^= 1
+        if self._initiative:
+            idx = self._p2_loc
+            self._p2_loc = prev_loc
+        else:
+            idx = self._p1_loc
+            self._p1_loc = prev_loc
+        blocked_keys, location_keys, initiative_key = self._zobrist
+        loc_keys = location_keys[self._initiative]
+        h = self._hash ^ blocked_keys[idx] ^ loc_keys[idx] ^ initiative_key
+        if prev_loc is not Board.NOT_MOVED:
+            h ^= loc_keys[prev_loc]
+        self._hash = h
+        self._blocked &= ~(1 << idx)
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self.__has_moves(self.__active_index())
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self.__has_moves(self.__active_index())
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +889,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self.__has_moves(self.__active_index()):
 
             if player == self._inactive_player:
                 return float("inf")
@@ -247,20 +899,38 @@ class Board(object):
 
         return 0.
 
+    def __location_index(self, player):
+        """Return the cell index of the specified player (or NOT_MOVED)."""
+        if player == self._player_1:
+            return self._p1_loc
+        elif player == self._player_2:
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_legal_moves: {}".format(player))
+
+    def __active_index(self):
+        """Return the cell index of the active player (or NOT_MOVED)."""
+        return self._p2_loc if self._initiative else self._p1_loc
+
+    def __has_moves(self, loc):
+        """Test whether a player at cell index `loc` has any legal move,
+        without building the list of moves.
+        """
+        if loc == Board.NOT_MOVED:
+            return self._blocked != self._full_mask
+        return bool(self._neighbors[loc] & ~self._blocked)
+
     def __get_moves(self, loc):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell index `loc`, using the precomputed
+        move table for this board size.
         """
         if loc == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
-        return valid_moves
+        blocked = self._blocked
+        return [move for idx, move in self._moves[loc]
+                if not blocked >> idx & 1]
 
     def print_board(self):
         """DEPRECATED - use Board.to_string()"""
@@ -271,29 +941,33 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        p1_loc = self._p1_loc
+        p2_loc = self._p2_loc
+        blocked = self._blocked
 
         col_margin = len(str(self.height - 1)) + 1
         prefix = "{:<" + "{}".format(col_margin) + "}"
         offset = " " * (col_margin + 3)
-        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        # cells are as wide as the column numbers, to keep them aligned on
+        # boards with more than ten columns
+        cell_width = len(str(self.width - 1))
+        lines = [offset + '   '.join(str(j).ljust(cell_width)
+                                     for j in range(self.width))]
         for i in range(self.height):
-            out += prefix.format(i) + ' | '
+            cells = []
             for j in range(self.width):
                 idx = i + j * self.height
-                if not self._board_state[idx]:
-                    out += ' '
+                if not blocked >> idx & 1:
+                    cells.append(' ')
                 elif p1_loc == idx:
-                    out += symbols[0]
+                    cells.append(symbols[0])
                 elif p2_loc == idx:
-                    out += symbols[1]
+                    cells.append(symbols[1])
                 else:
-                    out += '-'
-                out += ' | '
-            out += '\n\r'
-
-        return out
+                    cells.append('-')
+            lines.append(prefix.format(i) + ' | ' +
+                         ''.join(c.ljust(cell_width) + ' | ' for c in cells))
+        return '\n\r'.join(lines) + '\n\r'
 
     def play(self, time_limit=TIME_LIMIT_MILLIS):
         """Execute a match between the players by alternately soliciting them
@@ -314,15 +988,13 @@ class Board(object):
         """
         move_history = []
 
-        time_millis = lambda: 1000 * timeit.default_timer()
-
         while True:
 
             legal_player_moves = self.get_legal_moves()
             game_copy = self.copy()
 
-            move_start = time_millis()
-            time_left = lambda : time_limit - (time_millis() - move_start)
+            # the deadline is also a time_left() function, for older agents
+            time_left = Deadline(time_limit)
             curr_move = self._active_player.get_move(game_copy, time_left)
             move_end = time_left()
 
@@ -0,0 +1,273 @@
+"""Monte Carlo tree search agent for Isolation.
+
+The agent grows a search tree with the UCT rule (upper confidence bounds
+applied to trees): each iteration walks down the tree choosing the child
+with the best upper confidence bound on its win rate, adds one new position
+to the tree, finishes the game with random moves (`Board.random_playout()`,
+which plays on the bitboard without building any Board objects), and
+updates the win counts of the positions on the path. The move played is the
+most visited child of the root.
+
+The tree is kept between turns: on the next call, the node of the new
+position (after the agent's move and the opponent's reply) becomes the new
+root if it was already expanded, so the playouts of the previous turn are
+not lost.
+
+With more than one process, every worker process of a pool grows its own
+tree for the same position (root parallelization), and the visit counts of
+the root moves are added up.
+"""
+import math
+import multiprocessing
+import random
+import timeit
+
+import game_agent
+from isolation import Deadline, PLAYER_1, PLAYER_2
+
+# Exploration constant of the UCT rule
+UCT_EXPLORATION = math.sqrt(2)
+
+# Search state of a worker process, set by init_worker()
+_worker = {}
+
+
+class Node(object):
+    """A position of the search tree.
+
+    Parameters
+    ----------
+    move : (int, int) or None
+        The move that leads to the position from its parent.
+
+    untried : list<(int, int)>
+        The legal moves of the position that have no child node yet.
+
+    key : int
+        The hash of the position (see `Board.hash()`).
+    """
+    # nodes have no link to their parent, so the tree has no reference
+    # cycles and discarded subtrees are freed without the garbage collector
+    __slots__ = ("move", "children", "untried", "key", "wins", "visits",
+                 "size")
+
+    def __init__(self, move, untried, key):
+        self.move = move
+        self.children = []
+        self.untried = untried
+        self.key = key
+        # wins are counted for the player who made `move`
+        self.wins = 0
+        self.visits = 0
+        # number of nodes of the subtree rooted at this node
+        self.size = 1
+
+    def select(self, exploration):
+        """Return the child with the highest upper confidence bound."""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.wins / child.visits +
+            exploration * math.sqrt(log_visits / child.visits)))
+
+    def find(self, key, plies=2):
+        """Return the node of the position with hash `key` among the
+        descendants of this node up to `plies` moves deep, or None.
+        """
+        nodes = [self]
+        for _ in range(plies):
+            nodes = [child for node in nodes for child in node.children]
+            for node in nodes:
+                if node.key == key:
+                    return node
+        return None
+
+
+def init_worker(exploration, timeout, max_nodes):
+    """Create the search agent of a worker process of the pool."""
+    # forked workers inherit the state of the random number generator
+    random.seed()
+    _worker["player"] = MCTSPlayer(timeout=timeout, exploration=exploration,
+                                   max_nodes=max_nodes)
+
+
+def search_worker(board, deadline):
+    """Grow the tree of a worker process until `deadline` (a
+    `timeit.default_timer()` value), and return the number of visits and
+    wins of each root move.
+    """
+    player = _worker["player"]
+    player.time_left = Deadline(1000 * (deadline - timeit.default_timer()))
+    root = player.search(board)
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+class MCTSPlayer(game_agent.IsolationPlayer):
+    """Game-playing agent that chooses a move using Monte Carlo tree search.
+
+    The `search_depth` and `score_fn` parameters are accepted for
+    compatibility with the other agents, but are not used.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The exploration constant of the UCT rule.
+
+    max_nodes : int (optional)
+        The maximum number of nodes of the tree; once reached, the tree stops
+        growing and the iterations only run playouts from its leaves.
+
+    processes : int (optional)
+        The number of worker processes growing trees in parallel; with a
+        single process the search runs in the agent's own process.
+    """
+    def __init__(self, search_depth=3, score_fn=game_agent.custom_score,
+                 timeout=10., exploration=UCT_EXPLORATION, max_nodes=2**18,
+                 processes=1):
+        super().__init__(search_depth, score_fn, timeout)
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.processes = processes
+        self.root = None
+        self._size = 0
+        self._pool = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['root'] = None
+        state['_size'] = 0
+        state['_pool'] = None
+        state['time_left'] = None
+        return state
+
+    def close(self):
+        """Terminate the worker processes of the agent, if started."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def get_move(self, game, time_left):
+        """Search for the best move from the available legal moves and return a
+        result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        if self.processes > 1:
+            return self.parallel_search(game, legal_moves)
+
+        root = self.search(game)
+        if not root.children:
+            return legal_moves[0]
+        return max(root.children, key=lambda child: child.visits).move
+
+    def search(self, game):
+        """Grow the search tree of a position until the timer threshold is
+        reached, reusing the tree of the previous search if it contains the
+        position, and return the root node.
+        """
+        key = game.hash()
+        root = self.root.find(key) if self.root is not None else None
+        if root is None:
+            root = Node(None, game.get_legal_moves(shuffle=False), key)
+        # the rest of the previous tree is discarded with its nodes
+        self._size = root.size
+        self.root = root
+
+        # a full collection over a large tree takes longer than the timer
+        # threshold, so the garbage collector is paused during the search
+        with game_agent.paused_gc():
+            self._grow(root, game.copy())
+        return root
+
+    def _grow(self, root, board):
+        """Run search iterations from the root position (on `board`, a
+        private copy that is modified in place) until the timer threshold is
+        reached.
+        """
+        # an iteration costs much more than reading the clock, so the timer
+        # is checked before every iteration
+        time_left = self.time_left
+        threshold = self.TIMER_THRESHOLD
+        exploration = self.exploration
+        rng_index = random.randrange
+        while time_left() >= threshold:
+            node = root
+            path = [root]
+            # selection
+            while not node.untried and node.children:
+                node = node.select(exploration)
+                board.apply_move(node.move)
+                path.append(node)
+            # expansion
+            if node.untried and self._size < self.max_nodes:
+                untried = node.untried
+                idx = rng_index(len(untried))
+                untried[idx], untried[-1] = untried[-1], untried[idx]
+                move = untried.pop()
+                board.apply_move(move)
+                child = Node(move, board.get_legal_moves(shuffle=False),
+                             board.hash())
+                node.children.append(child)
+                for ancestor in path:
+                    ancestor.size += 1
+                path.append(child)
+                self._size += 1
+            # simulation, and backpropagation of the result along the path
+            won = board.random_playout() is board.inactive_player
+            for node in reversed(path):
+                node.visits += 1
+                if won:
+                    node.wins += 1
+                won = not won
+            for _ in range(len(path) - 1):
+                board.undo_move()
+
+    def parallel_search(self, game, legal_moves):
+        """Grow one tree per worker process and return the root move with
+        the most visits over all the trees.
+        """
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(
+                self.processes, initializer=init_worker,
+                initargs=(self.exploration, self.TIMER_THRESHOLD,
+                          self.max_nodes))
+
+        # the workers stop one timer threshold early, leaving the agent that
+        # much time to collect their results
+        deadline = (timeit.default_timer() +
+                    (self.time_left() - self.TIMER_THRESHOLD) / 1000.)
+        board = game.copy_with_players(PLAYER_1, PLAYER_2)
+        tasks = [self._pool.apply_async(search_worker, (board, deadline))
+                 for _ in range(self.processes)]
+
+        # add up the visits of the trees returned before the timer expires
+        visits = dict.fromkeys(legal_moves, 0)
+        for task in tasks:
+            wait = (self.time_left() - self.TIMER_THRESHOLD) / 1000.
+            try:
+                for move, (count, _) in task.get(timeout=max(wait, 0.)).items():
+                    visits[move] += count
+            except multiprocessing.TimeoutError:
+                break
+        return max(legal_moves, key=visits.__getitem__)
@@ -0,0 +1,192 @@
+"""Opening book for the Isolation agents.
+
+The book maps the positions of the first plies of a game to the move chosen
+by a deep alpha-beta search of that position. Positions that are symmetric
+images of each other (rotations and reflections of the board) share a single
+entry, keyed by the canonical hash of the position (see
+`Board.canonical_hash()`), and the stored move is mapped back to the
+orientation of the board when the book is used.
+
+The book is generated offline with:
+
+    python opening_book.py --plies 3 --time 1000
+
+and stored in a compact binary file: a header (magic, board width, board
+height, number of entries) followed by the entries sorted by key, each made
+of a 64-bit position key and the 16-bit cell index of the move. The file is
+only read the first time the book is used.
+
+The moves of the book are those of the heuristic used to generate it, so an
+agent should only use a book generated with its own heuristic: the agents
+take the path of the book as their `opening_book` parameter.
+"""
+import argparse
+import os
+import struct
+import timeit
+
+from isolation import Board, PLAYER_1, PLAYER_2
+
+# Location of the opening book shipped with the agents, generated with the
+# custom_score heuristic
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 "opening_book.bin")
+
+BOOK_MAGIC = b"ISOBOOK1"
+HEADER_FORMAT = "<8sHHI"
+ENTRY_FORMAT = "<QH"
+
+
+class OpeningBook(object):
+    """Lookup table of the moves to play in the first plies of a game.
+
+    Parameters
+    ----------
+    path : str (optional)
+        The file the book is read from the first time it is used. A missing
+        file gives an empty book.
+    """
+    def __init__(self, path=DEFAULT_BOOK_PATH):
+        self.path = path
+        self.width = None
+        self.height = None
+        self._entries = None
+
+    def __deepcopy__(self, memo):
+        # the book is read-only, so every copy of an agent can share it
+        return self
+
+    def __getstate__(self):
+        # reload the book lazily in other processes instead of pickling it
+        state = self.__dict__.copy()
+        state['_entries'] = None
+        return state
+
+    def __len__(self):
+        self.load()
+        return len(self._entries)
+
+    def load(self):
+        """Read the book file, if it has not been read yet."""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as book_file:
+            data = book_file.read()
+        magic, self.width, self.height, count = struct.unpack_from(
+            HEADER_FORMAT, data)
+        if magic != BOOK_MAGIC:
+            raise RuntimeError("{} is not an opening book.".format(self.path))
+        offset = struct.calcsize(HEADER_FORMAT)
+        for key, idx in struct.iter_unpack(ENTRY_FORMAT, data[offset:]):
+            self._entries[key] = idx
+
+    def save(self, path=None):
+        """Write the book to a file (by default, the file it was read from)."""
+        path = path or self.path
+        self.load()
+        with open(path, "wb") as book_file:
+            book_file.write(struct.pack(HEADER_FORMAT, BOOK_MAGIC, self.width,
+                                        self.height, len(self._entries)))
+            for key in sorted(self._entries):
+                book_file.write(struct.pack(ENTRY_FORMAT, key,
+                                            self._entries[key]))
+
+    def add(self, game, move):
+        """Record the move to play in the position of a game."""
+        self.load()
+        if self.width is None:
+            self.width, self.height = game.width, game.height
+        key, sym = game.canonical_hash()
+        row, col = game.transform_move(move, sym)
+        self._entries[key] = row + col * game.height
+
+    def lookup(self, game):
+        """Return the book move for the position of a game, or None if the
+        position is not in the book.
+        """
+        self.load()
+        if (not self._entries or game.width != self.width or
+                game.height != self.height):
+            return None
+        key, sym = game.canonical_hash()
+        if key not in self._entries:
+            return None
+        # map the move of the canonical image back to this board
+        idx = self._entries[key]
+        move = game.transform_move((idx % game.height, idx // game.height),
+                                   sym, inverse=True)
+        if move not in game.get_legal_moves():
+            return None
+        return move
+
+
+def generate_book(plies, time_limit, width=7, height=7, path=DEFAULT_BOOK_PATH,
+                  verbose=False):
+    """Build an opening book by searching every position of the first plies.
+
+    Parameters
+    ----------
+    plies : int
+        The book contains every position reached after fewer than `plies`
+        moves (up to symmetry).
+
+    time_limit : float
+        The number of milliseconds of iterative deepening search spent on
+        each position.
+
+    width, height : int (optional)
+        The size of the board.
+
+    path : str (optional)
+        The file the book is written to.
+
+    Returns
+    -------
+    OpeningBook
+        The new book.
+    """
+    # imported here so that the agents can import this module
+    from game_agent import AlphaBetaPlayer, custom_score
+
+    book = OpeningBook(path)
+    book._entries = {}
+    book.width, book.height = width, height
+    player = AlphaBetaPlayer(score_fn=custom_score, opening_book=None,
+                             time_management=False)
+
+    positions = [Board(PLAYER_1, PLAYER_2, width, height)]
+    for ply in range(plies):
+        children = {}
+        for game in positions:
+            board = game.copy_with_active_player(player)
+            start = timeit.default_timer()
+            time_left = lambda: time_limit - 1000 * (timeit.default_timer() - start)
+            book.add(game, player.get_move(board, time_left))
+
+            if ply + 1 < plies:
+                for move in game.get_legal_moves(shuffle=False):
+                    child = game.forecast_move(move)
+                    children.setdefault(child.canonical_hash()[0], child)
+        if verbose:
+            print("Ply {}: {} positions".format(ply, len(positions)))
+        positions = list(children.values())
+
+    book.save()
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the opening book " +
+        "of the Isolation agents by searching the first plies of the game.")
+    parser.add_argument('-p', '--plies', type=int, default=3,
+                        help="Number of plies covered by the book.")
+    parser.add_argument('-t', '--time', type=float, default=1000.,
+                        help="Milliseconds of search for each position.")
+    parser.add_argument('-o', '--output', default=DEFAULT_BOOK_PATH,
+                        help="File the book is written to.")
+    args = parser.parse_args()
+    book = generate_book(args.plies, args.time, path=args.output, verbose=True)
+    print("Wrote {} positions to {}".format(len(book), args.output))
@@ -0,0 +1,215 @@
+"""Parallel version of the iterative deepening alpha-beta agent.
+
+The root moves of each position are split between a pool of worker
+processes. Every worker runs iterative deepening alpha-beta search (with its
+own transposition table, kept between turns) over its share of the root
+moves, and the workers share the best root score found at each depth so that
+they can use it as the lower bound (alpha) of their own root search. The
+agent then plays the best move of the deepest iteration completed by every
+worker.
+"""
+import multiprocessing
+import timeit
+
+import game_agent
+from isolation import Deadline, PLAYER_1, PLAYER_2
+
+# Maximum search depth for which root scores are shared between workers
+MAX_SHARED_DEPTH = 128
+
+# Search state of a worker process, set by init_worker()
+_worker = {}
+
+
+def init_worker(score_fn, timeout, tt_size, shared_scores):
+    """Create the search agent of a worker process of the pool."""
+    _worker["player"] = game_agent.AlphaBetaPlayer(
+        score_fn=score_fn, timeout=timeout, tt_size=tt_size)
+    _worker["scores"] = shared_scores
+
+
+def search_root_moves(board, root_moves, deadline, turn):
+    """Run iterative deepening alpha-beta search over a subset of the root
+    moves in a worker process.
+
+    Parameters
+    ----------
+    board : `isolation.Board`
+        The position to search, registered with the PLAYER_1 and PLAYER_2
+        placeholders.
+
+    root_moves : list<(int, int)>
+        The root moves searched by this worker.
+
+    deadline : float
+        The `timeit.default_timer()` value at which the worker stops.
+
+    turn : int
+        The identifier of the turn, used to ignore shared scores left by
+        workers still finishing a previous turn.
+
+    Returns
+    -------
+    list<(float, (int, int))>
+        The best score and move of each completed iteration. The score is
+        -inf when no move of this worker beat the best score shared by the
+        other workers for that depth.
+    """
+    player = _worker["player"]
+    scores = _worker["scores"]
+    board = board.copy_with_active_player(player)
+
+    player.time_left = Deadline(1000 * (deadline - timeit.default_timer()))
+    player.new_search()
+    player.root_moves = root_moves
+    # searching deeper than the number of open cells cannot change the result
+    max_depth = min(len(board.get_blank_spaces()), MAX_SHARED_DEPTH - 1)
+    results = []
+    with game_agent.paused_gc():
+        try:
+            for depth in range(1, max_depth + 1):
+                alpha = scores[depth] if scores[0] == turn else float("-inf")
+                move = player.alphabeta(board, depth, alpha)
+                score = player.root_score
+                if score > alpha:
+                    with scores.get_lock():
+                        if scores[0] == turn and score > scores[depth]:
+                            scores[depth] = score
+                else:
+                    score = float("-inf")
+                results.append((score, move))
+                player.pv_move = move
+        except game_agent.SearchTimeout:
+            pass
+    return results
+
+
+def choose_root_move(results, default):
+    """Return the best move of the deepest iteration completed by all the
+    workers whose results were collected (see search_root_moves()), or
+    `default` if there is none.
+    """
+    if not results:
+        return default
+    depth = min(len(result) for result in results)
+    if depth == 0:
+        return default
+    # a -inf score only means that a worker that did not return found better
+    _, best_move = max((result[depth - 1] for result in results),
+                       key=lambda entry: entry[0])
+    return best_move
+
+
+class ParallelAlphaBetaPlayer(game_agent.IsolationPlayer):
+    """Game-playing agent that splits iterative deepening alpha-beta search
+    at the root between a pool of worker processes.
+
+    The pool is started on the first call to get_move() and can be shut down
+    with close(); the agent can also be pickled (without its pool), so it can
+    be sent to other processes like the other agents.
+
+    Parameters
+    ----------
+    processes : int (optional)
+        The number of worker processes; defaults to the number of CPUs.
+
+    tt_size : int (optional)
+        The number of entries of the transposition table of each worker.
+
+    opening_book : str or None (optional)
+        The path of the opening book file, or None (the default) to search
+        every move.
+    """
+    def __init__(self, search_depth=3, score_fn=game_agent.custom_score,
+                 timeout=10., processes=None, tt_size=2**16,
+                 opening_book=None):
+        super().__init__(search_depth, score_fn, timeout)
+        self.processes = processes or multiprocessing.cpu_count()
+        self.tt_size = tt_size
+        self.book = (game_agent.OpeningBook(opening_book) if opening_book
+                     else None)
+        self._pool = None
+        self._scores = None
+        self._turn = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        state['_scores'] = None
+        state['time_left'] = None
+        return state
+
+    def close(self):
+        """Terminate the worker processes of the agent, if started."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def get_move(self, game, time_left):
+        """Search for the best move from the available legal moves and return a
+        result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        if self.book is not None:
+            book_move = self.book.lookup(game)
+            if book_move is not None:
+                return book_move
+
+        if self._pool is None:
+            self._scores = multiprocessing.Array('d', MAX_SHARED_DEPTH)
+            self._pool = multiprocessing.Pool(
+                self.processes, initializer=init_worker,
+                initargs=(self.score, self.TIMER_THRESHOLD, self.tt_size,
+                          self._scores))
+
+        # reset the shared root scores for this turn
+        self._turn += 1
+        with self._scores.get_lock():
+            self._scores[0] = self._turn
+            for depth in range(1, MAX_SHARED_DEPTH):
+                self._scores[depth] = float("-inf")
+
+        # the workers stop one timer threshold early, leaving the agent that
+        # much time to collect their results
+        deadline = (timeit.default_timer() +
+                    (time_left() - self.TIMER_THRESHOLD) / 1000.)
+        board = game.copy_with_players(PLAYER_1, PLAYER_2)
+        num_tasks = min(self.processes, len(legal_moves))
+        tasks = [self._pool.apply_async(
+                     search_root_moves,
+                     (board, legal_moves[i::num_tasks], deadline, self._turn))
+                 for i in range(num_tasks)]
+
+        # collect the results, giving up on workers that are too slow to
+        # return before the timer expires
+        results = []
+        for task in tasks:
+            wait = (self.time_left() - self.TIMER_THRESHOLD / 2.) / 1000.
+            try:
+                results.append(task.get(timeout=max(wait, 0.)))
+            except multiprocessing.TimeoutError:
+                break
+        return choose_root_move(results, legal_moves[0])
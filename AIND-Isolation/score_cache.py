@@ -0,0 +1,82 @@
+"""Memoizing wrapper for the heuristic evaluation functions of the agents.
+
+Iterative deepening searches the same positions again at every iteration,
+and transpositions reach them through different move orders, so the
+evaluation function is called many times on identical positions. Wrap any
+`score_fn` in a `ScoreCache` to compute each value once:
+
+    player = AlphaBetaPlayer(score_fn=ScoreCache(custom_score, size=2**16))
+
+The cache is keyed by the Zobrist hash of the position (see `Board.hash()`)
+and by the player the score is computed for, holds at most `size` entries,
+and evicts the least recently used entry when it is full. The `hits`,
+`misses` and `evictions` counters report how well it works.
+
+If the heuristic has a batch version (see `game_agent.BATCH_SCORES`), the
+search keeps scoring all the children one ply above the horizon at once
+with it, bypassing the cache, since that is faster than looking the
+children up one at a time; the cache then only holds the other leaves.
+Heuristics without a batch version are cached at every leaf.
+"""
+from collections import OrderedDict
+
+# Key xored into the position hash when the score is computed for the
+# player who is not to move
+INACTIVE_PLAYER_KEY = 0x632BE59BD9B4E019
+
+
+class ScoreCache(object):
+    """A heuristic evaluation function with a cache of its values.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The evaluation function, called as `score_fn(game, player)`.
+
+    size : int (optional)
+        The maximum number of values in the cache; each entry takes about
+        150 bytes.
+    """
+    def __init__(self, score_fn, size=2**16):
+        self.score_fn = score_fn
+        self.size = size
+        self._values = OrderedDict()
+        self.reset_counters()
+
+    def __call__(self, game, player):
+        """Return `score_fn(game, player)`, from the cache if possible."""
+        key = game.hash()
+        if player != game.active_player:
+            key ^= INACTIVE_PLAYER_KEY
+        values = self._values
+        value = values.get(key)
+        if value is not None:
+            values.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = self.score_fn(game, player)
+        values[key] = value
+        if len(values) > self.size:
+            values.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def __len__(self):
+        return len(self._values)
+
+    def clear(self):
+        """Remove all values from the cache (the counters are kept)."""
+        self._values.clear()
+
+    def reset_counters(self):
+        """Reset the hit, miss and eviction counters."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        """The fraction of the calls answered from the cache."""
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.
@@ -0,0 +1,196 @@
+"""Opt-in search instrumentation for the Isolation agents.
+
+Attach a `SearchStats` object to an agent with `instrument()` to record, for
+every move it plays, the number of nodes searched, the depth of the last
+completed iteration, the number of cutoffs, the average branching factor,
+the time spent in the evaluation function and in move generation, and how
+close the agent got to its timer threshold:
+
+    player = instrument(AlphaBetaPlayer(), log_path="stats.jsonl",
+                        label="AB_Custom")
+
+Each move is appended to `stats.records` and, if a log path is given, written
+as one JSON object per line to the log file, so that the records of games
+played in several processes can be collected in one file and summarized with
+`read_log()` and `summarize()` (see `tournament.py --stats-log`).
+
+Agents without a `stats` object pay no cost for the instrumentation.
+"""
+import json
+import timeit
+from collections import OrderedDict, defaultdict
+
+
+def instrument(player, log_path=None, label=None):
+    """Attach a new `SearchStats` object to an agent and return the agent."""
+    player.stats = SearchStats(log_path, label)
+    return player
+
+
+class SearchStats(object):
+    """Counters of the search of one agent, recorded move by move.
+
+    The search increments the counters of the current move directly (e.g.,
+    `stats.nodes += 1`), and wraps the functions it wants timed with
+    `timed()`.
+
+    Parameters
+    ----------
+    log_path : str (optional)
+        A file that every record is appended to as a line of JSON.
+
+    label : str (optional)
+        The name of the agent in the records (e.g., the tournament name).
+    """
+    def __init__(self, log_path=None, label=None):
+        self.log_path = log_path
+        self.label = label
+        self.records = []
+        self.reset()
+
+    def reset(self):
+        """Reset the counters of the current move."""
+        self.nodes = 0
+        self.expanded = 0
+        self.children = 0
+        self.cutoffs = 0
+        self.tt_hits = 0
+        self.depth = 0
+        self.iterations = []
+        self.times = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._move_count = None
+        self._time_left = None
+        self._threshold = 0.
+        self._start = None
+
+    def timed(self, fn, name):
+        """Return a wrapper of `fn` adding the duration and number of its
+        calls to the `name` counters of the current move.
+        """
+        times, calls = self.times, self.calls
+        timer = timeit.default_timer
+
+        def wrapper(*args, **kwargs):
+            start = timer()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                times[name] += timer() - start
+                calls[name] += 1
+        return wrapper
+
+    def start_move(self, game, time_left, threshold):
+        """Start recording the search of a move."""
+        self.reset()
+        self._move_count = game.move_count
+        self._time_left = time_left
+        self._threshold = threshold
+        self._start = timeit.default_timer()
+
+    def end_iteration(self, depth):
+        """Record an iteration of iterative deepening completed at `depth`."""
+        elapsed = 1000 * (timeit.default_timer() - self._start)
+        self.depth = depth
+        self.iterations.append((depth, self.nodes, round(elapsed, 3)))
+
+    def end_move(self, move, source):
+        """Finish recording a move and store its record.
+
+        Parameters
+        ----------
+        move : (int, int)
+            The move played.
+
+        source : str
+            How the move was chosen (e.g., "search", "book" or "endgame").
+
+        Returns
+        -------
+        dict
+            The record of the move.
+        """
+        elapsed = 1000 * (timeit.default_timer() - self._start)
+        time_left = self._time_left()
+        record = OrderedDict([
+            ("label", self.label),
+            ("move_count", self._move_count),
+            ("move", list(move)),
+            ("source", source),
+            ("depth", self.depth),
+            ("nodes", self.nodes),
+            ("cutoffs", self.cutoffs),
+            ("tt_hits", self.tt_hits),
+            ("branching", (self.children / self.expanded
+                           if self.expanded else 0.)),
+            ("elapsed_ms", elapsed),
+            ("score_ms", 1000 * self.times["score"]),
+            ("score_calls", self.calls["score"]),
+            ("movegen_ms", 1000 * self.times["movegen"]),
+            ("movegen_calls", self.calls["movegen"]),
+            ("time_left_ms", time_left),
+            ("margin_ms", time_left - self._threshold),
+            ("iterations", self.iterations),
+        ])
+        self.records.append(record)
+        if self.log_path is not None:
+            with open(self.log_path, "a") as log_file:
+                log_file.write(json.dumps(record) + "\n")
+        return record
+
+
+def read_log(path):
+    """Return the list of records of a log file written by `SearchStats`."""
+    with open(path) as log_file:
+        return [json.loads(line) for line in log_file if line.strip()]
+
+
+def summarize(records):
+    """Aggregate move records by agent label.
+
+    Returns
+    -------
+    dict
+        For each label, the number of moves, the mean depth and number of
+        nodes of searched moves, the search speed (nodes per second), the
+        mean branching factor and cutoffs per node, the fraction of the
+        search time spent in the evaluation function and in move generation,
+        and the smallest margin left above the timer threshold.
+    """
+    groups = OrderedDict()
+    for record in records:
+        groups.setdefault(record["label"], []).append(record)
+
+    summary = OrderedDict()
+    for label, moves in groups.items():
+        searched = [r for r in moves if r["source"] == "search"] or moves
+        nodes = sum(r["nodes"] for r in searched)
+        elapsed = sum(r["elapsed_ms"] for r in searched) or 1.
+        summary[label] = OrderedDict([
+            ("moves", len(moves)),
+            ("depth", sum(r["depth"] for r in searched) / len(searched)),
+            ("nodes", nodes / len(searched)),
+            ("nodes_per_sec", 1000 * nodes / elapsed),
+            ("branching", sum(r["branching"] for r in searched) / len(searched)),
+            ("cutoff_rate", sum(r["cutoffs"] for r in searched) / max(nodes, 1)),
+            ("score_share", sum(r["score_ms"] for r in searched) / elapsed),
+            ("movegen_share", sum(r["movegen_ms"] for r in searched) / elapsed),
+            ("min_margin_ms", min(r["margin_ms"] for r in moves)),
+        ])
+    return summary
+
+
+def format_summary(summary):
+    """Return the aggregated statistics of `summarize()` as a text table."""
+    lines = ["{:<14}{:>7}{:>7}{:>10}{:>10}{:>7}{:>8}{:>8}{:>8}{:>9}".format(
+        "Agent", "Moves", "Depth", "Nodes", "Nodes/s", "Branch", "Cut/n",
+        "Score", "Movegen", "Margin")]
+    for label, stats in summary.items():
+        lines.append(
+            "{:<14}{:>7}{:>7.2f}{:>10.0f}{:>10.0f}{:>7.2f}{:>8.3f}{:>8.0%}"
+            "{:>8.0%}{:>9.1f}".format(
+                str(label), stats["moves"], stats["depth"], stats["nodes"],
+                stats["nodes_per_sec"], stats["branching"],
+                stats["cutoff_rate"], stats["score_share"],
+                stats["movegen_share"], stats["min_margin_ms"]))
+    return "\n".join(lines)
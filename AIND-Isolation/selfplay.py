@@ -0,0 +1,305 @@
+"""Self-play pipeline generating labeled positions for heuristic tuning.
+
+Worker processes play games between copies of the agents with
+`Board.play()`, starting from random openings, and sample the positions where
+an agent had to choose between several moves. Every sample holds the
+position, the eventual outcome of the game for the player to move, and the
+score and depth of the agent's search of the position (see
+`AlphaBetaPlayer.pv_score`).
+
+The games are split into shards played independently (each with its own
+seed, so the output does not depend on the number of processes), and every
+worker writes the samples of its shard to its own file, so nothing but a
+count goes back to the parent process:
+
+    python selfplay.py --games 100000 --processes 8 --out-dir samples
+
+A shard file starts with a header (magic, board width, board height, number
+of samples) followed by one array per column, in the order of `COLUMNS`:
+the blocked cells of each sample as a bitboard of ceil(width * height / 8)
+bytes, then one value per sample for each of the other columns. A 7x7
+sample takes 23 bytes. Read a shard with `read_shard()`, and rebuild the
+positions with `iter_samples()`.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import struct
+import timeit
+
+from array import array
+from collections import OrderedDict, namedtuple
+from copy import deepcopy
+
+from isolation import Board, PLAYER_1, PLAYER_2
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+SHARD_MAGIC = b"ISOSAMP1"
+HEADER_FORMAT = "<8sHHI"
+
+# Columns of a shard besides the blocked cells, with their array typecode:
+# the game and ply of the sample, the location of each player (-1 if they
+# have not moved), the outcome for the player to move (1 for a win, -1 for
+# a loss), and the search score (NaN if the move was not searched) and depth
+COLUMNS = [("game", "I"), ("ply", "H"), ("p1_loc", "h"), ("p2_loc", "h"),
+           ("outcome", "b"), ("score", "f"), ("depth", "B")]
+
+# A sample read from a shard: a board set to the position, and the values
+# of the other columns
+Sample = namedtuple("Sample", ["board", "game", "ply", "outcome", "score",
+                               "depth"])
+
+TIME_LIMIT = 150  # number of milliseconds of each move
+OPENING_PLIES = 2  # number of random moves at the start of each game
+
+
+def blocked_size(width, height):
+    """Return the number of bytes of the bitboard of a board size."""
+    return (width * height + 7) // 8
+
+
+class ShardBuffer(object):
+    """Column arrays of the samples of a shard, written to a file at once.
+
+    Parameters
+    ----------
+    width, height : int
+        The size of the boards of the samples.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.blocked = bytearray()
+        self.columns = OrderedDict((name, array(typecode))
+                                   for name, typecode in COLUMNS)
+
+    def __len__(self):
+        return len(self.columns["game"])
+
+    def append(self, position, game, ply, outcome, score, depth):
+        """Add a sample (`position` is a `Board.get_position()` value)."""
+        blocked, p1_loc, p2_loc = position
+        self.blocked += blocked.to_bytes(
+            blocked_size(self.width, self.height), "little")
+        values = (game, ply,
+                  -1 if p1_loc == Board.NOT_MOVED else p1_loc,
+                  -1 if p2_loc == Board.NOT_MOVED else p2_loc,
+                  outcome, float("nan") if score is None else score,
+                  depth or 0)
+        for column, value in zip(self.columns.values(), values):
+            column.append(value)
+
+    def save(self, path):
+        """Write the samples to a shard file."""
+        with open(path, "wb") as shard_file:
+            shard_file.write(struct.pack(HEADER_FORMAT, SHARD_MAGIC,
+                                         self.width, self.height, len(self)))
+            shard_file.write(self.blocked)
+            for column in self.columns.values():
+                shard_file.write(column.tobytes())
+
+
+def read_shard(path):
+    """Read a shard file.
+
+    Returns
+    -------
+    (int, int, bytes, OrderedDict<str, array>)
+        The width and height of the boards, the bitboards of the blocked
+        cells of the samples, and the array of each of `COLUMNS`.
+    """
+    with open(path, "rb") as shard_file:
+        data = shard_file.read()
+    magic, width, height, count = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != SHARD_MAGIC:
+        raise RuntimeError("{} is not a sample shard.".format(path))
+    offset = struct.calcsize(HEADER_FORMAT)
+    size = blocked_size(width, height) * count
+    blocked = data[offset:offset + size]
+    offset += size
+    columns = OrderedDict()
+    for name, typecode in COLUMNS:
+        column = array(typecode)
+        size = column.itemsize * count
+        column.frombytes(data[offset:offset + size])
+        if len(column) != count:
+            raise RuntimeError("Truncated shard {}.".format(path))
+        columns[name] = column
+        offset += size
+    return width, height, blocked, columns
+
+
+def iter_samples(path):
+    """Iterate over the samples of a shard file. The same board is set to
+    the position of every sample in turn; copy it to keep a position.
+    """
+    width, height, blocked, columns = read_shard(path)
+    nbytes = blocked_size(width, height)
+    board = Board(PLAYER_1, PLAYER_2, width, height)
+    rows = zip(*columns.values())
+    for idx, (game, ply, p1_loc, p2_loc, outcome, score, depth) in \
+            enumerate(rows):
+        mask = int.from_bytes(blocked[idx * nbytes:(idx + 1) * nbytes],
+                              "little")
+        board.set_position((mask,
+                            Board.NOT_MOVED if p1_loc < 0 else p1_loc,
+                            Board.NOT_MOVED if p2_loc < 0 else p2_loc))
+        yield Sample(board, game, ply, outcome,
+                     None if math.isnan(score) else score, depth)
+
+
+def play_game(player_1, player_2, width, height, opening_plies, time_limit,
+              rng):
+    """Play a game from a random opening and return its samples.
+
+    Returns
+    -------
+    list<(tuple, int, int, float, int)>
+        The position, the ply, the outcome for the player to move, and the
+        search score and depth of each position where the player to move had
+        more than one legal move.
+    """
+    game = Board(player_1, player_2, width, height)
+    for _ in range(opening_plies):
+        moves = game.get_legal_moves(shuffle=False)
+        if not moves:
+            break
+        game.apply_move(rng.choice(moves))
+
+    # record the search of every move through the agents' get_move()
+    searched = []
+    for player in (player_1, player_2):
+        def get_move(board, time_left, player=player,
+                     search=player.get_move):
+            move = search(board, time_left)
+            if len(board.get_legal_moves()) > 1:
+                searched.append((board.get_position(), board.move_count,
+                                 player, getattr(player, "pv_score", None),
+                                 getattr(player, "pv_depth", None)))
+            return move
+        player.get_move = get_move
+
+    winner, _, _ = game.play(time_limit=time_limit)
+    return [(position, ply, 1 if player is winner else -1, score, depth)
+            for position, ply, player, score, depth in searched]
+
+
+def play_shard(task):
+    """Play the games of a shard and write their samples to a file.
+
+    Parameters
+    ----------
+    task : tuple
+        The index of the shard, the path of its file, the agents, the board
+        size, the number of games, the number of random opening plies, the
+        time limit of each move in milliseconds, and the seed of the shard.
+
+    Returns
+    -------
+    (int, int, int)
+        The index of the shard, and the number of games and of samples.
+    """
+    (index, path, agents, (width, height), num_games, opening_plies,
+     time_limit, seed) = task
+    rng = random.Random(seed)
+    shard = ShardBuffer(width, height)
+    for game_idx in range(num_games):
+        random.seed(rng.getrandbits(32))
+        # fresh agents for every game, playing both sides in turn
+        player_1, player_2 = deepcopy(agents)
+        if game_idx % 2:
+            player_1, player_2 = player_2, player_1
+        game_id = index * num_games + game_idx
+        for position, ply, outcome, score, depth in play_game(
+                player_1, player_2, width, height, opening_plies,
+                time_limit, rng):
+            shard.append(position, game_id, ply, outcome, score, depth)
+    shard.save(path)
+    return index, num_games, len(shard)
+
+
+def generate(out_dir, num_games, agents=None, processes=1, games_per_shard=100,
+             size=(7, 7), opening_plies=OPENING_PLIES, time_limit=TIME_LIMIT,
+             seed=None, verbose=True):
+    """Play self-play games and write their samples to shard files.
+
+    Parameters
+    ----------
+    out_dir : str
+        The directory of the shard files (`shard-00000.bin`, ...).
+
+    num_games : int
+        The number of games, rounded up to whole shards.
+
+    agents : (object, object) (optional)
+        The agents playing the games, copied for every game; by default two
+        alpha-beta agents with the improved_score heuristic.
+
+    processes : int (optional)
+        The number of worker processes playing the shards.
+
+    games_per_shard : int (optional)
+        The number of games of each shard.
+
+    Returns
+    -------
+    (int, int)
+        The number of games and of samples.
+    """
+    if agents is None:
+        agents = (AlphaBetaPlayer(score_fn=improved_score),
+                  AlphaBetaPlayer(score_fn=improved_score))
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    rng = random.Random(seed)
+    num_shards = -(-num_games // games_per_shard)
+    tasks = [(index, os.path.join(out_dir, "shard-{:05d}.bin".format(index)),
+              agents, size, games_per_shard, opening_plies, time_limit,
+              rng.getrandbits(32))
+             for index in range(num_shards)]
+
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    results = (map(play_shard, tasks) if pool is None
+               else pool.imap_unordered(play_shard, tasks))
+    total_games = total_samples = 0
+    start = timeit.default_timer()
+    try:
+        for done, (_, games, samples) in enumerate(results, 1):
+            total_games += games
+            total_samples += samples
+            if verbose:
+                elapsed = timeit.default_timer() - start
+                print("{}/{} shards, {} games, {} samples ({:.0f} samples/s)"
+                      .format(done, num_shards, total_games, total_samples,
+                              total_samples / elapsed))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return total_games, total_samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate labeled " +
+        "positions by playing games between alpha-beta agents.")
+    parser.add_argument('-n', '--games', type=int, default=1000,
+                        help="Number of games.")
+    parser.add_argument('-o', '--out-dir', default="samples",
+                        help="Directory of the shard files.")
+    parser.add_argument('-p', '--processes', type=int, default=1,
+                        help="Number of worker processes playing the games.")
+    parser.add_argument('--games-per-shard', type=int, default=100,
+                        help="Number of games written to each shard file.")
+    parser.add_argument('--size', type=int, nargs=2, default=[7, 7],
+                        metavar=("WIDTH", "HEIGHT"), help="Board size.")
+    parser.add_argument('-t', '--time-limit', type=float, default=TIME_LIMIT,
+                        help="Milliseconds of each move.")
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help="Seed of the openings and of the games.")
+    args = parser.parse_args()
+    generate(args.out_dir, args.games, processes=args.processes,
+             games_per_shard=args.games_per_shard, size=tuple(args.size),
+             time_limit=args.time_limit, seed=args.seed)
@@ -0,0 +1,228 @@
+"""Non-recursive alpha-beta search for the Isolation agents.
+
+`StackAlphaBetaPlayer` plays like `game_agent.AlphaBetaPlayer` (same
+transposition table, move ordering, principal variation search, aspiration
+windows, opening book, endgame solver and time management), but its
+alphabeta() method walks the game tree with an explicit stack of frames
+instead of recursive `max_value`/`min_value` closures:
+
+- no closures are created and no Python frames are pushed per node;
+- the timer is only read every `check_interval` nodes instead of at every
+  node;
+- running out of time does not unwind any Python frames: the board being
+  searched is a private copy, so the loop is simply abandoned, and
+  SearchTimeout is raised from alphabeta() itself to keep the interface of
+  the other agents.
+"""
+from operator import itemgetter
+
+import game_agent
+
+class StackAlphaBetaPlayer(game_agent.AlphaBetaPlayer):
+    """Game-playing agent using iterative deepening alpha-beta search with
+    an explicit stack (see the module documentation).
+
+    Parameters
+    ----------
+    check_interval : int (optional)
+        The number of nodes searched between two checks of the timer.
+    """
+    def __init__(self, search_depth=3, score_fn=game_agent.custom_score,
+                 timeout=10., tt_size=2**16, opening_book=None,
+                 time_management=True, check_interval=64):
+        super().__init__(search_depth, score_fn, timeout, tt_size,
+                         opening_book, time_management)
+        self.check_interval = check_interval
+
+    def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+        """Search a position to a fixed depth with alpha-beta pruning.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            An instance of the Isolation game `Board` class representing the
+            current game state
+
+        depth : int
+            Depth is an integer representing the maximum number of plies to
+            search in the game tree before aborting
+
+        alpha : float
+            Alpha limits the lower bound of search on minimizing layers
+
+        beta : float
+            Beta limits the upper bound of search on maximizing layers
+
+        Returns
+        -------
+        (int, int)
+            The board coordinates of the best move found in the current search;
+            (-1, -1) if there are no legal moves
+
+        Raises
+        ------
+        SearchTimeout
+            If the timer reaches the threshold before the search finishes.
+        """
+        inf = float("inf")
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise game_agent.SearchTimeout()
+
+        tt = self.tt
+        time_left = self.time_left
+        threshold = self.TIMER_THRESHOLD
+        check_interval = self.check_interval
+        score_fn = self.score
+        batch = game_agent.get_batch_score(score_fn)
+        stats = self.stats
+        if stats is not None:
+            score_fn = stats.timed(score_fn, "score")
+            if batch is not None:
+                batch = stats.timed(batch, "score")
+        salt = game_agent.MAXIMIZER_KEYS[game.move_count % 2]
+        null_window = game_agent.NULL_WINDOW
+
+        # search a private copy in place with apply_move/undo_move, so that
+        # stopping the search cannot leave the caller's board modified
+        game = game.copy()
+        if stats is not None:
+            game.get_legal_moves = stats.timed(game.get_legal_moves, "movegen")
+            stats.nodes += 1
+        valid_moves = game.get_legal_moves(shuffle=False)
+        if self.root_moves is not None:
+            valid_moves = [m for m in valid_moves if m in self.root_moves]
+        self.root_score = -inf
+        if depth == 0 or not valid_moves:
+            return (-1, -1)
+        if stats is not None:
+            stats.expanded += 1
+            stats.children += len(valid_moves)
+
+        # search the best move of the previous iteration first, or else the
+        # best move of the previous search of this position
+        root_key = game.hash() ^ salt
+        entry = tt.lookup(root_key)
+        first_move = entry[4] if entry is not None else None
+        if self.pv_move in valid_moves:
+            first_move = self.pv_move
+        valid_moves = self.order_moves(game, valid_moves, 0, first_move)
+
+        # state of the frame being searched (starting with the root); the
+        # frames of its ancestors are saved on the stack
+        maximizing, d, a, b, a_orig, b_orig = True, depth, alpha, beta, alpha, beta
+        key, ply, moves, next_idx = root_key, 0, valid_moves, 0
+        best, best_move, probing = -inf, valid_moves[0], False
+        stack = []
+        nodes = 0
+        # value of the child position that was just searched, if any
+        value = None
+        while True:
+            enter = False
+            if value is not None:
+                game.undo_move()
+                move = moves[next_idx - 1]
+                if probing and a < value < b:
+                    # the null window probe beat the bound: search the move
+                    # again with the full window
+                    game.apply_move(move)
+                    child_a, child_b = a, b
+                    enter = True
+                elif maximizing:
+                    if value > best or next_idx == 1:
+                        best, best_move = value, move
+                    if best >= b:
+                        next_idx = len(moves)
+                        self.update_cutoff(game, move, ply, d)
+                        if stats is not None:
+                            stats.cutoffs += 1
+                    elif best > a:
+                        a = best
+                else:
+                    if value < best or next_idx == 1:
+                        best, best_move = value, move
+                    if best <= a:
+                        next_idx = len(moves)
+                        self.update_cutoff(game, move, ply, d)
+                        if stats is not None:
+                            stats.cutoffs += 1
+                    elif best < b:
+                        b = best
+                probing = False
+                value = None
+
+            if not enter:
+                if next_idx == len(moves):
+                    # all the moves are searched (or cut off): return the
+                    # value to the parent frame
+                    if stack or self.root_moves is None:
+                        tt.save(key, d, best, a_orig, b_orig, best_move)
+                    if not stack:
+                        break
+                    value = best
+                    (maximizing, d, a, b, a_orig, b_orig, key, ply, moves,
+                     next_idx, best, best_move, probing) = stack.pop()
+                    continue
+                # search the next move, with a null window unless it is the
+                # first move or the bound is still infinite
+                move = moves[next_idx]
+                next_idx += 1
+                game.apply_move(move)
+                child_a, child_b = a, b
+                if next_idx > 1:
+                    if maximizing and a != -inf:
+                        child_b = a + null_window
+                        probing = True
+                    elif not maximizing and b != inf:
+                        child_a = b - null_window
+                        probing = True
+
+            # enter the child position
+            nodes += 1
+            if nodes % check_interval == 0 and time_left() < threshold:
+                raise game_agent.SearchTimeout()
+            if stats is not None:
+                stats.nodes += 1
+            child_depth = d - 1
+            child_moves = game.get_legal_moves(shuffle=False)
+            if child_depth == 0 or not child_moves:
+                value = score_fn(game, self)
+                continue
+            child_key = game.hash() ^ salt
+            value, child_a, child_b, tt_move = tt.probe(
+                child_key, child_depth, child_a, child_b)
+            if value is not None:
+                if stats is not None:
+                    stats.tt_hits += 1
+                continue
+            if stats is not None:
+                stats.expanded += 1
+                stats.children += len(child_moves)
+            child_ply = depth - child_depth
+            if child_depth == 1 and batch is not None:
+                # score all the children at once above the search horizon
+                if stats is not None:
+                    stats.nodes += len(child_moves)
+                if maximizing:
+                    best_m, value = min(batch(game, self), key=itemgetter(1))
+                    cutoff = value <= child_a
+                else:
+                    best_m, value = max(batch(game, self), key=itemgetter(1))
+                    cutoff = value >= child_b
+                if cutoff:
+                    self.update_cutoff(game, best_m, child_ply, child_depth)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                tt.save(child_key, child_depth, value, child_a, child_b, best_m)
+                continue
+            stack.append((maximizing, d, a, b, a_orig, b_orig, key, ply,
+                          moves, next_idx, best, best_move, probing))
+            maximizing = not maximizing
+            d, a, b, a_orig, b_orig = (child_depth, child_a, child_b,
+                                       child_a, child_b)
+            key, ply, next_idx = child_key, child_ply, 0
+            moves = self.order_moves(game, child_moves, child_ply, tt_move)
+            best = -inf if maximizing else inf
+            best_move, probing = None, False
+
+        self.root_score = best
+        return best_move
@@ -0,0 +1,83 @@
+"""Unit tests for the benchmark suite."""
+
+import unittest
+
+import benchmark
+import game_agent
+
+
+class BenchmarkTest(unittest.TestCase):
+    """The benchmark positions are reproducible and the results complete"""
+
+    def test_suite_positions_cover_the_game(self):
+        positions = benchmark.suite_positions()
+        self.assertEqual([phase for phase, _ in positions],
+                         [phase for phase, _ in benchmark.PHASES
+                          for _ in range(benchmark.POSITIONS_PER_PHASE)])
+        self.assertEqual([game.hash() for _, game in positions],
+                         [game.hash() for _, game in
+                          benchmark.suite_positions()])
+        self.assertTrue(all(game.get_legal_moves() for _, game in positions))
+
+    def test_search_node_counts_are_reproducible(self):
+        positions = [game for _, game in benchmark.suite_positions()][:3]
+        results = [benchmark.search_benchmark(
+            lambda: game_agent.AlphaBetaPlayer(opening_book=None),
+            lambda player, game: benchmark.iterative_deepening(player, game, 4),
+            positions, repeat=1) for _ in range(2)]
+        self.assertEqual(results[0]["nodes"], results[1]["nodes"])
+        self.assertGreater(results[0]["nodes_per_sec"], 0)
+
+    def test_compare_with_baseline(self):
+        baseline = {"hash": {"calls_per_sec": 100.},
+                    "copy": {"calls_per_sec": 100.},
+                    "search": {"nodes": 10, "nodes_per_sec": 100.}}
+        results = {"hash": {"calls_per_sec": 85.},
+                   "search": {"nodes": 11, "nodes_per_sec": 200.}}
+        rows = benchmark.compare(results, baseline, tolerance=0.1)
+        self.assertEqual([(name, metric, status)
+                          for name, metric, _, _, status in sorted(rows)],
+                         [("copy", "calls_per_sec", "missing"),
+                          ("hash", "calls_per_sec", "regression"),
+                          ("search", "nodes", "changed"),
+                          ("search", "nodes_per_sec", "ok")])
+        self.assertIn("regression", benchmark.format_comparison(rows))
+
+    def test_compare_relative_to_reference(self):
+        baseline = {benchmark.REFERENCE: {"calls_per_sec": 100.},
+                    "hash": {"calls_per_sec": 100.},
+                    "copy": {"calls_per_sec": 100.}}
+        # the whole machine runs at half speed, and copy() regressed
+        results = {benchmark.REFERENCE: {"calls_per_sec": 50.},
+                   "hash": {"calls_per_sec": 45.},
+                   "copy": {"calls_per_sec": 30.}}
+        rows = benchmark.compare(results, baseline, tolerance=0.2)
+        self.assertEqual([(name, status) for name, _, _, _, status in rows],
+                         [(benchmark.REFERENCE, "ok"), ("hash", "ok"),
+                          ("copy", "regression")])
+
+    def test_median_results(self):
+        runs = [{"hash": {"calls_per_sec": value, "nodes": 3}}
+                for value in (10., 30., 20.)]
+        self.assertEqual(benchmark.median_results(runs),
+                         {"hash": {"calls_per_sec": 20., "nodes": 3}})
+
+    def test_positions_are_reproducible(self):
+        positions = benchmark.make_positions(9, 3, seed=1)
+        self.assertEqual([game.hash() for game in positions],
+                         [game.hash() for game in
+                          benchmark.make_positions(9, 3, seed=1)])
+        self.assertEqual(positions[0].move_count, 1)
+        self.assertTrue(all(game.move_count >= 2 for game in positions[1:]))
+
+    def test_measure_board_size(self):
+        result = benchmark.measure(8, time_limit=40, count=2)
+        self.assertEqual(result["size"], 8)
+        self.assertTrue(all(value > 0 for key, value in result.items()
+                            if key.endswith("_per_sec")))
+        self.assertGreaterEqual(result["depth"], 1)
+        self.assertIn("8x8", benchmark.format_results([result]))
+
+
+if __name__ == '__main__':
+    unittest.main()
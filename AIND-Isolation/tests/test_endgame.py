@@ -0,0 +1,75 @@
+"""Unit tests for the partition detection and the endgame solver."""
+
+import random
+import unittest
+
+from isolation import Board
+from isolation.endgame import EndgameSolver, EndgameTimeout
+
+
+def exhaustive_value(game):
+    """Game-theoretic value of a game for its active player (+1 or -1)"""
+    moves = game.get_legal_moves(shuffle=False)
+    if not moves:
+        return -1
+    return max(-exhaustive_value(game.forecast_move(m)) for m in moves)
+
+
+class EndgameTest(unittest.TestCase):
+    """The solver agrees with an exhaustive search of separated games"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def partitioned_games(self, count, max_blank=16):
+        rng = random.Random(0)
+        games = []
+        while len(games) < count:
+            game = Board(self.player1, self.player2)
+            while game.get_legal_moves():
+                game.apply_move(rng.choice(game.get_legal_moves()))
+                if (game.is_partitioned() and game.get_legal_moves() and
+                        len(game.get_blank_spaces()) <= max_blank):
+                    games.append(game.copy())
+                    break
+        return games
+
+    def test_partition_detection(self):
+        game = Board(self.player1, self.player2)
+        self.assertFalse(game.is_partitioned())
+        game.apply_move((0, 0))
+        game.apply_move((6, 6))
+        self.assertFalse(game.is_partitioned())
+        self.assertEqual(len(game.get_reachable_cells()), 47)
+        # block every cell except the corners' knight moves
+        game = Board(self.player1, self.player2)
+        game.apply_move((0, 0))
+        game.apply_move((6, 6))
+        for row in range(7):
+            for col in range(7):
+                if (row, col) not in [(0, 0), (6, 6), (1, 2), (4, 5)]:
+                    game._blocked |= 1 << (row + col * 7)
+        self.assertTrue(game.is_partitioned())
+        self.assertEqual(game.get_reachable_cells(self.player1), [(1, 2)])
+        self.assertEqual(game.get_reachable_cells(self.player2), [(4, 5)])
+
+    def test_solver_matches_exhaustive_search(self):
+        solver = EndgameSolver()
+        for game in self.partitioned_games(10):
+            move, value = solver.solve(game)
+            self.assertIn(move, game.get_legal_moves())
+            expected = exhaustive_value(game)
+            self.assertEqual(value > 0, expected > 0)
+            if expected > 0:
+                self.assertEqual(exhaustive_value(game.forecast_move(move)), -1)
+
+    def test_solver_timeout(self):
+        game = self.partitioned_games(1, max_blank=49)[0]
+        solver = EndgameSolver(time_left=lambda: 0., threshold=1.)
+        solver.CHECK_INTERVAL = 1
+        self.assertRaises(EndgameTimeout, solver.solve, game)
+
+
+if __name__ == '__main__':
+    unittest.main()
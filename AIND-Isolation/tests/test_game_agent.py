@@ -3,10 +3,12 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import random
 import unittest
 
 import isolation
 import game_agent
+import sample_players
 
 from importlib import reload
 
@@ -25,5 +27,192 @@ class IsolationTest(unittest.TestCase):
         self.fail("Hello, World!")
 
 
+class InPlaceSearchTest(unittest.TestCase):
+    """Searches apply and undo moves without changing the caller's board"""
+
+    def setUp(self):
+        reload(game_agent)
+        self.player1 = game_agent.MinimaxPlayer()
+        self.player2 = game_agent.AlphaBetaPlayer()
+        self.game = isolation.Board(self.player1, self.player2)
+        self.game.apply_move((2, 3))
+        self.game.apply_move((4, 4))
+
+    def test_minimax_leaves_board_unchanged(self):
+        before = self.game.to_string()
+        self.player1.time_left = lambda: 1000.
+        move = self.player1.minimax(self.game, 3)
+        self.assertIn(move, self.game.get_legal_moves())
+        self.assertEqual(before, self.game.to_string())
+
+    def test_alphabeta_leaves_board_unchanged(self):
+        self.game.apply_move((0, 2))
+        before = self.game.to_string()
+        self.player2.time_left = lambda: 1000.
+        move = self.player2.alphabeta(self.game, 3)
+        self.assertIn(move, self.game.get_legal_moves())
+        self.assertEqual(before, self.game.to_string())
+
+
+
+def minimax_value(game, player, depth, score_fn):
+    """Plain depth-limited minimax value of a game for the given player"""
+    moves = game.get_legal_moves()
+    if depth == 0 or not moves:
+        return score_fn(game, player)
+    values = [minimax_value(game.forecast_move(m), player, depth - 1, score_fn)
+              for m in moves]
+    return max(values) if game.active_player == player else min(values)
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """The transposition table must not change the result of the search"""
+
+    def setUp(self):
+        reload(game_agent)
+        self.score_fn = sample_players.improved_score
+        self.player1 = game_agent.AlphaBetaPlayer(score_fn=self.score_fn)
+        self.player2 = "Player2"
+        self.game = isolation.Board(self.player1, self.player2)
+        for move in [(2, 3), (4, 4), (0, 2), (2, 5)]:
+            self.game.apply_move(move)
+        self.player1.time_left = lambda: 1000.
+
+    def assertOptimal(self, move, depth):
+        values = {m: minimax_value(self.game.forecast_move(m), self.player1,
+                                   depth - 1, self.score_fn)
+                  for m in self.game.get_legal_moves()}
+        self.assertEqual(values[move], max(values.values()))
+
+    def test_search_with_table_is_optimal(self):
+        for depth in range(1, 5):
+            self.assertOptimal(self.player1.alphabeta(self.game, depth), depth)
+        # the table now holds deeper results for many of the positions
+        move = self.player1.alphabeta(self.game, 3)
+        self.assertIn(move, self.game.get_legal_moves())
+
+    def test_aspiration_search_is_optimal(self):
+        # a wrong previous score forces searching again with a full window
+        for previous in (-20., 20., 0.):
+            self.player1.tt.clear()
+            for depth in range(1, 5):
+                if depth > 1:
+                    self.player1.root_score = previous
+                move = self.player1.aspiration_search(self.game, depth)
+                self.assertOptimal(move, depth)
+                values = [minimax_value(self.game.forecast_move(m),
+                                        self.player1, depth - 1, self.score_fn)
+                          for m in self.game.get_legal_moves()]
+                self.assertEqual(self.player1.root_score, max(values))
+
+    def test_root_entry_is_stored(self):
+        move = self.player1.alphabeta(self.game, 3)
+        key = self.game.hash() ^ game_agent.MAXIMIZER_KEYS[0]
+        entry = self.player1.tt.lookup(key)
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry[1], 3)
+        self.assertEqual(entry[4], move)
+
+    def test_move_ordering(self):
+        player = self.player1
+        moves = self.game.get_legal_moves()
+        player.history[0][moves[-1]] = 10
+        player.update_cutoff(self.game, moves[-2], 1, 2)
+        ordered = player.order_moves(self.game, list(moves), 1, moves[-3])
+        self.assertEqual(ordered[:3], [moves[-3], moves[-2], moves[-1]])
+        self.assertEqual(sorted(ordered), sorted(moves))
+        player.new_search()
+        self.assertEqual(player.killers, {})
+        self.assertEqual(player.history[0][moves[-1]], 5)
+
+    def test_table_size_is_bounded(self):
+        table = game_agent.TranspositionTable(size=8)
+        for key in range(100):
+            table.save(key, 1, 0., -1., 1., (0, 0))
+        self.assertEqual(len(table._slots), 8)
+        self.assertEqual(table.lookup(99)[0], 99)
+        self.assertIsNone(table.lookup(3))
+
+
+
+class BatchScoreTest(unittest.TestCase):
+    """Batch heuristics match the scalar heuristics on every child"""
+
+    def setUp(self):
+        reload(game_agent)
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def test_batch_scores_match(self):
+        random.seed(0)
+        for _ in range(20):
+            game = isolation.Board(self.player1, self.player2)
+            while True:
+                for score_fn, batch_fn in game_agent.BATCH_SCORES.items():
+                    for player in (self.player1, self.player2):
+                        expected = {m: score_fn(game.forecast_move(m), player)
+                                    for m in game.get_legal_moves()}
+                        self.assertEqual(dict(batch_fn(game, player)), expected)
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                game.apply_move(random.choice(moves))
+
+
+class TimeManagerTest(unittest.TestCase):
+    """Iterative deepening stops when the next iteration cannot finish"""
+
+    def setUp(self):
+        reload(game_agent)
+        self.clock = [0.]
+        self.time_left = lambda: 100. - self.clock[0]
+        self.manager = game_agent.TimeManager()
+        self.manager.start(self.time_left, 10.)
+
+    def iteration(self, millis, move):
+        self.clock[0] += millis
+        return self.manager.next_iteration(move)
+
+    def test_skip_iteration_predicted_to_overrun(self):
+        self.assertTrue(self.iteration(2., (0, 0)))
+        self.assertTrue(self.iteration(8., (1, 1)))
+        self.assertEqual(self.manager.predict(), 32.)
+        # 42ms used, and the next iteration needs about 128ms of the 48 left
+        self.assertFalse(self.iteration(32., (0, 0)))
+        self.assertEqual(self.manager.predict(), 128.)
+
+    def test_stop_when_best_move_is_stable(self):
+        self.manager.soft_fraction = 0.05
+        self.assertTrue(self.iteration(1., (0, 0)))
+        for _ in range(3):
+            self.assertTrue(self.iteration(1., (2, 2)))
+        # the best move is stable and 5ms > 5% of the 90ms available are used
+        self.assertFalse(self.iteration(1., (2, 2)))
+
+    def test_search_stops_once_game_is_solved(self):
+        player = game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score, opening_book=None)
+        depths = []
+        alphabeta = player.alphabeta
+        def search(game, depth, *args):
+            depths.append(depth)
+            return alphabeta(game, depth, *args)
+        player.alphabeta = search
+
+        game = isolation.Board(player, "Player2", 4, 4)
+        for move in [(0, 0), (3, 3), (1, 2), (1, 1)]:
+            game.apply_move(move)
+        self.assertIn(player.get_move(game, lambda: 1000.),
+                      game.get_legal_moves())
+        self.assertLessEqual(depths[-1], len(game.get_blank_spaces()))
+        # forced moves are not searched
+        del depths[:]
+        game = isolation.Board(player, "Player2", 4, 4)
+        for move in [(0, 0), (1, 2)]:
+            game.apply_move(move)
+        self.assertEqual(player.get_move(game, lambda: 1000.), (2, 1))
+        self.assertEqual(depths, [])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,106 @@
+"""Unit tests for the game record log."""
+
+import os
+import random
+import tempfile
+import unittest
+
+import game_records
+import tournament
+from game_records import GameRecord, GameRecordWriter
+from isolation import Board
+from sample_players import GreedyPlayer, RandomPlayer
+
+
+def random_game(width, height, seed):
+    """Return a random game as (moves, winner)."""
+    rng = random.Random(seed)
+    game = Board("Player1", "Player2", width, height)
+    moves = []
+    while True:
+        legal_moves = game.get_legal_moves(shuffle=False)
+        if not legal_moves:
+            return moves, int(game.active_player == "Player1")
+        moves.append(rng.choice(legal_moves))
+        game.apply_move(moves[-1])
+
+
+class GameRecordTest(unittest.TestCase):
+    """Records are read back as written and replay the games"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_records_round_trip(self):
+        records = []
+        for idx, (width, height) in enumerate([(7, 7), (5, 8), (20, 20)]):
+            moves, winner = random_game(width, height, idx)
+            records.append(GameRecord(("AB_Custom", "Zoë"), width, height,
+                                      moves, 2, winner, "illegal move",
+                                      None if idx else 12345))
+        with GameRecordWriter(self.path) as writer:
+            writer.write(records[0])
+        # appending to an existing log keeps the records written before
+        with GameRecordWriter(self.path) as writer:
+            for record in records[1:]:
+                writer.write(record)
+        self.assertEqual(list(game_records.read_records(self.path)), records)
+        self.assertEqual(os.path.getsize(self.path),
+                         len(game_records.LOG_MAGIC) +
+                         sum(game_records.RECORD_SIZE + 2 + 9 + 4 +
+                             len(r.moves) * (1 if r.width < 16 else 2)
+                             for r in records))
+
+    def test_replay(self):
+        moves, winner = random_game(7, 7, 3)
+        record = GameRecord(("Player1", "Player2"), 7, 7, moves, 0, winner,
+                            "illegal move", None)
+        replayed = []
+        for game, move in game_records.replay(record):
+            self.assertIn(move, game.get_legal_moves())
+            replayed.append(move)
+        self.assertEqual(replayed, moves)
+        final = game_records.final_position(record)
+        self.assertEqual(final.move_count, len(moves))
+        self.assertTrue(final.is_winner(record.players[winner]))
+
+    def test_truncated_log(self):
+        moves, winner = random_game(7, 7, 1)
+        with GameRecordWriter(self.path) as writer:
+            writer.write(GameRecord(("a", "b"), 7, 7, moves, 0, winner,
+                                    "timeout", 1))
+        with open(self.path, "rb+") as log_file:
+            log_file.truncate(os.path.getsize(self.path) - 1)
+        self.assertRaises(RuntimeError, list,
+                          game_records.read_records(self.path))
+
+    def test_tournament_log(self):
+        cpu_agent = tournament.Agent(RandomPlayer(), "Random")
+        test_agents = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        wins = {cpu_agent.player: 0, test_agents[0].player: 0}
+        with GameRecordWriter(self.path) as writer:
+            tournament.play_round(cpu_agent, test_agents, wins, 2, seed=5,
+                                  game_log=writer)
+        records = list(game_records.read_records(self.path))
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[0].players, ("Random", "Greedy"))
+        summary = game_records.summarize(records)
+        self.assertEqual(sum(s["games"] for s in summary.values()), 4)
+        self.assertEqual(wins[test_agents[0].player],
+                         sum(summary[("Random", "Greedy")]["wins"][1:]) +
+                         summary[("Greedy", "Random")]["wins"][0])
+        for record in records:
+            final = game_records.final_position(record)
+            self.assertEqual(record.opening_plies, 2)
+            if record.termination == "illegal move":
+                self.assertTrue(final.is_winner(record.players[record.winner]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+"""Unit tests for the bitboard implementation of `isolation.Board`."""
+
+import random
+import unittest
+
+from isolation import Board, Deadline, PLAYER_1, PLAYER_2
+from sample_players import RandomPlayer
+
+
+class BoardStateTest(unittest.TestCase):
+    """Check that the bitboard state matches the rules of the game"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+        self.game = Board(self.player1, self.player2)
+
+    def test_first_moves_are_blank_spaces(self):
+        self.assertEqual(len(self.game.get_legal_moves()), 49)
+        self.game.apply_move((2, 3))
+        self.assertEqual(len(self.game.get_legal_moves()), 48)
+        self.assertNotIn((2, 3), self.game.get_legal_moves())
+
+    def test_knight_moves(self):
+        self.game.apply_move((0, 0))
+        self.game.apply_move((6, 6))
+        self.assertEqual(sorted(self.game.get_legal_moves()), [(1, 2), (2, 1)])
+        self.game.apply_move((1, 2))
+        self.game.apply_move((5, 4))
+        self.assertEqual(self.game.get_player_location(self.player1), (1, 2))
+        self.assertEqual(self.game.get_player_location(self.player2), (5, 4))
+        self.assertNotIn((0, 0), self.game.get_legal_moves(self.player1))
+
+    def test_unshuffled_moves_follow_move_table(self):
+        self.game.apply_move((3, 3))
+        self.game.apply_move((0, 0))
+        moves = self.game.get_legal_moves(shuffle=False)
+        self.assertEqual(moves, self.game.get_legal_moves(shuffle=False))
+        self.assertEqual(sorted(moves), sorted(self.game.get_legal_moves()))
+        self.assertEqual(len(moves), 8)
+
+    def test_forecast_does_not_modify_board(self):
+        self.game.apply_move((3, 3))
+        self.game.apply_move((0, 0))
+        before = self.game.to_string()
+        new_game = self.game.forecast_move((1, 1))
+        self.assertEqual(before, self.game.to_string())
+        self.assertNotEqual(before, new_game.to_string())
+        self.assertNotEqual(self.game.hash(), new_game.hash())
+        self.assertEqual(new_game.active_player, self.player2)
+
+    def test_undo_move_restores_board(self):
+        self.game.apply_move((3, 3))
+        self.game.apply_move((0, 0))
+        before = (self.game.to_string(), self.game.hash(),
+                  self.game.move_count, self.game.active_player)
+        for move in self.game.get_legal_moves():
+            self.game.apply_move(move)
+            self.game.apply_move(self.game.get_legal_moves()[0])
+            self.game.undo_move()
+            self.game.undo_move()
+            after = (self.game.to_string(), self.game.hash(),
+                     self.game.move_count, self.game.active_player)
+            self.assertEqual(before, after)
+        self.game.undo_move()
+        self.game.undo_move()
+        self.assertEqual(len(self.game.get_legal_moves()), 49)
+        self.assertRaises(RuntimeError, self.game.undo_move)
+
+    def test_zobrist_hash_is_path_independent(self):
+        game = self.game.copy()
+        for move in [(0, 0), (6, 6), (1, 2), (5, 4)]:
+            self.game.apply_move(move)
+        for move in [(1, 2), (5, 4), (0, 0), (6, 6)]:
+            game.apply_move(move)
+        # the blocked cells match but the players are in different places
+        self.assertNotEqual(game.hash(), self.game.hash())
+        self.assertNotEqual(game, self.game)
+        game = Board(self.player1, self.player2)
+        for move in [(0, 0), (6, 6), (1, 2), (5, 3)]:
+            game.apply_move(move)
+        game.undo_move()
+        game.apply_move((5, 4))
+        self.assertEqual(game.hash(), self.game.hash())
+        self.assertEqual(game, self.game)
+        self.assertEqual(len({game, self.game}), 1)
+
+    def test_symmetric_hashes_match_transformed_games(self):
+        for width, height in [(7, 7), (6, 5)]:
+            game = Board(self.player1, self.player2, width, height)
+            moves = [(0, 1), (height // 2, width // 2), (2, 0)]
+            for move in moves:
+                game.apply_move(move)
+            hashes = game.symmetric_hashes()
+            self.assertEqual(len(hashes), 8 if width == height else 4)
+            self.assertEqual(hashes[0], game.hash())
+            for sym, sym_hash in enumerate(hashes):
+                image = Board(self.player1, self.player2, width, height)
+                for move in moves:
+                    image.apply_move(game.transform_move(move, sym))
+                self.assertEqual(image.hash(), sym_hash)
+                self.assertEqual(image.canonical_hash()[0],
+                                 game.canonical_hash()[0])
+                for move in moves:
+                    self.assertEqual(game.transform_move(
+                        game.transform_move(move, sym), sym, inverse=True),
+                        move)
+
+    def test_random_playout_leaves_board_unchanged(self):
+        for move in [(3, 3), (0, 0), (1, 5)]:
+            self.game.apply_move(move)
+        before = (self.game.to_string(), self.game.hash())
+        winners = [self.game.random_playout(random.Random(seed))
+                   for seed in range(20)]
+        self.assertEqual(before, (self.game.to_string(), self.game.hash()))
+        self.assertTrue(set(winners) <= {self.player1, self.player2})
+        self.assertEqual(len(set(winners)), 2)
+        self.assertEqual(winners, [self.game.random_playout(random.Random(seed))
+                                   for seed in range(20)])
+
+    def test_large_boards(self):
+        game = Board(self.player1, self.player2, 32, 30)
+        self.assertEqual(len(game.get_legal_moves()), 960)
+        game.apply_move((29, 31))
+        game.apply_move((0, 0))
+        blanks = game.get_blank_spaces()
+        self.assertEqual(len(blanks), 958)
+        self.assertEqual(blanks[:2], [(1, 0), (2, 0)])
+        self.assertNotIn((29, 31), blanks)
+        self.assertEqual(sorted(game.get_reachable_cells(self.player2)),
+                         sorted(blanks))
+        self.assertEqual(sorted(game.get_legal_moves()), [(27, 30), (28, 29)])
+        lines = game.to_string().split('\n\r')
+        self.assertEqual(lines[0].index('31'), lines[30].index('1'))
+        self.assertEqual(lines[1].index('2'), lines[0].index('0 '))
+        self.assertIn(game.random_playout(random.Random(0)),
+                      (self.player1, self.player2))
+
+    def test_set_position(self):
+        rng = random.Random(0)
+        for _ in range(5):
+            self.game.apply_move(rng.choice(self.game.get_legal_moves()))
+        board = Board(self.player1, self.player2)
+        board.set_position(self.game.get_position())
+        self.assertEqual(board.to_string(), self.game.to_string())
+        self.assertEqual(board.hash(), self.game.hash())
+        self.assertIs(board.active_player, self.game.active_player)
+        self.assertEqual(sorted(board.get_legal_moves()),
+                         sorted(self.game.get_legal_moves()))
+        board.set_position(Board(self.player1, self.player2).get_position())
+        self.assertEqual(board.move_count, 0)
+        self.assertEqual(board.hash(), Board(self.player1,
+                                             self.player2).hash())
+
+    def test_copy_with_active_player(self):
+        agent = object()
+        for move in [(3, 3), (0, 0), None]:
+            board = self.game.copy_with_active_player(agent)
+            self.assertIs(board.active_player, agent)
+            self.assertIn(board.inactive_player, (PLAYER_1, PLAYER_2))
+            self.assertEqual(board.get_player_location(agent),
+                             self.game.get_player_location(
+                                 self.game.active_player))
+            self.assertEqual(board.hash(), self.game.hash())
+            if move is not None:
+                self.game.apply_move(move)
+
+    def test_legacy_board_state(self):
+        self.game.apply_move((1, 2))
+        state = self.game._board_state
+        self.assertEqual(len(state), 52)
+        self.assertEqual(state[-1], 1 + 2 * 7)
+        self.assertEqual(state[-2], Board.NOT_MOVED)
+        self.assertEqual(state[-3], 1)
+        self.assertEqual(sum(state[:-3]), 1)
+
+    def test_play_to_completion(self):
+        game = Board(RandomPlayer(), RandomPlayer())
+        winner, history, outcome = game.play()
+        self.assertIn(winner, (game._player_1, game._player_2))
+        self.assertTrue(game.is_winner(winner))
+        self.assertEqual(game.utility(winner), float("inf"))
+        self.assertEqual(len(history), game.move_count)
+
+
+class DeadlineTest(unittest.TestCase):
+    """Board.play hands out deadlines that older agents can call"""
+
+    def test_deadline_is_a_time_left_function(self):
+        deadline = Deadline(100.)
+        left = deadline()
+        self.assertTrue(0 < left <= 100.)
+        self.assertLessEqual(deadline(), left)
+        self.assertTrue(Deadline(-1.)() < 0)
+
+    def test_expired_samples_the_clock(self):
+        deadline = Deadline(-1., interval=4)
+        self.assertEqual([deadline.expired() for _ in range(8)],
+                         [False, False, False, True] * 2)
+        self.assertEqual(deadline.clock_reads, 2)
+        deadline = Deadline(100., interval=1)
+        self.assertFalse(deadline.expired())
+        self.assertTrue(deadline.expired(margin=200.))
+
+    def test_play_passes_deadlines(self):
+        player = RandomPlayer()
+        received = []
+        get_move = player.get_move
+        def record(game, time_left):
+            received.append(time_left)
+            return get_move(game, time_left)
+        player.get_move = record
+        Board(player, RandomPlayer()).play()
+        self.assertTrue(received)
+        self.assertTrue(all(isinstance(t, Deadline) for t in received))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Unit tests for the Monte Carlo tree search agent."""
+
+import pickle
+import timeit
+import unittest
+
+import isolation
+import mcts_agent
+from sample_players import improved_score
+
+
+def time_limit(ms):
+    start = timeit.default_timer()
+    return lambda: ms - 1000 * (timeit.default_timer() - start)
+
+
+class MCTSPlayerTest(unittest.TestCase):
+    """The agent returns legal moves in time and keeps its tree"""
+
+    def setUp(self):
+        self.player = mcts_agent.MCTSPlayer()
+        self.game = isolation.Board(self.player, "Player2")
+        for move in [(2, 3), (4, 4)]:
+            self.game.apply_move(move)
+
+    def tearDown(self):
+        self.player.close()
+
+    def test_get_move_before_timeout(self):
+        time_left = time_limit(150)
+        move = self.player.get_move(self.game, time_left)
+        self.assertIn(move, self.game.get_legal_moves())
+        self.assertGreater(time_left(), 0)
+        root = self.player.root
+        self.assertGreater(root.visits, 0)
+        self.assertEqual(root.visits,
+                         sum(child.visits for child in root.children))
+
+    def test_tree_is_reused(self):
+        move = self.player.get_move(self.game, time_limit(150))
+        self.game.apply_move(move)
+        self.game.apply_move(self.game.get_legal_moves()[0])
+        node = self.player.root.find(self.game.hash())
+        if node is None:
+            self.skipTest("reply not expanded in the previous search")
+        visits = node.visits
+        self.player.get_move(self.game, time_limit(50))
+        self.assertIs(self.player.root, node)
+        self.assertGreater(node.visits, visits)
+
+    def test_tree_size_on_reuse(self):
+        def count(node):
+            return 1 + sum(count(child) for child in node.children)
+        for _ in range(4):
+            move = self.player.get_move(self.game, time_limit(50))
+            self.game.apply_move(move)
+            self.assertEqual(self.player._size, count(self.player.root))
+            self.assertEqual(self.player.root.size, count(self.player.root))
+            if not self.game.get_legal_moves():
+                break
+            self.game.apply_move(self.game.get_legal_moves()[0])
+            if not self.game.get_legal_moves():
+                break
+
+    def test_parallel_search(self):
+        # the other test modules reload game_agent, so the default score
+        # function is not always the one that pickle finds
+        player = mcts_agent.MCTSPlayer(score_fn=improved_score, processes=2)
+        self.addCleanup(player.close)
+        game = self.game.copy_with_players(player, "Player2")
+        time_left = time_limit(300)
+        self.assertIn(player.get_move(game, time_left),
+                      game.get_legal_moves())
+        self.assertGreater(time_left(), 0)
+        copy = pickle.loads(pickle.dumps(player))
+        self.assertIsNone(copy._pool)
+        self.assertIsNone(copy.root)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Unit tests for the opening book."""
+
+import os
+import tempfile
+import unittest
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer, custom_score
+from opening_book import DEFAULT_BOOK_PATH, OpeningBook
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Book moves are shared between symmetric positions"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+        handle, self.path = tempfile.mkstemp(suffix=".bin")
+        os.close(handle)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_symmetric_positions_share_keys(self):
+        game = Board(self.player1, self.player2)
+        game.apply_move((0, 1))
+        game.apply_move((3, 3))
+        images = [[(0, 1), (3, 3)], [(1, 0), (3, 3)], [(6, 5), (3, 3)],
+                  [(5, 6), (3, 3)], [(0, 5), (3, 3)], [(6, 1), (3, 3)]]
+        for moves in images:
+            other = Board(self.player1, self.player2)
+            for move in moves:
+                other.apply_move(move)
+            self.assertEqual(other.canonical_hash()[0], game.canonical_hash()[0])
+        other = Board(self.player1, self.player2)
+        other.apply_move((3, 3))
+        other.apply_move((0, 1))
+        self.assertNotEqual(other.canonical_hash()[0], game.canonical_hash()[0])
+
+    def test_save_and_lookup(self):
+        book = OpeningBook(self.path)
+        self.assertEqual(len(book), 0)
+        game = Board(self.player1, self.player2)
+        game.apply_move((0, 1))
+        game.apply_move((3, 3))
+        book.add(game, (2, 2))
+        book.save()
+
+        book = OpeningBook(self.path)
+        self.assertEqual(book.lookup(game), (2, 2))
+        # the move is mapped through the symmetry of the position
+        mirror = Board(self.player1, self.player2)
+        mirror.apply_move((0, 5))
+        mirror.apply_move((3, 3))
+        self.assertEqual(book.lookup(mirror), (2, 4))
+        self.assertIsNone(book.lookup(game.forecast_move((2, 2))))
+        self.assertIsNone(book.lookup(Board(self.player1, self.player2, 5, 5)))
+
+    def test_book_is_opt_in(self):
+        self.assertIsNone(AlphaBetaPlayer().book)
+        player = AlphaBetaPlayer(score_fn=custom_score,
+                                 opening_book=DEFAULT_BOOK_PATH)
+        self.assertEqual(player.book.path, DEFAULT_BOOK_PATH)
+
+
+if __name__ == '__main__':
+    unittest.main()
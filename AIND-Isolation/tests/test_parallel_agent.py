@@ -0,0 +1,57 @@
+"""Unit tests for the parallel alpha-beta agent."""
+
+import pickle
+import timeit
+import unittest
+
+import isolation
+import parallel_agent
+from sample_players import improved_score
+
+
+class ParallelAlphaBetaTest(unittest.TestCase):
+    """The parallel agent returns a legal move before the timer expires"""
+
+    def setUp(self):
+        self.player1 = parallel_agent.ParallelAlphaBetaPlayer(
+            score_fn=improved_score, processes=2)
+        self.player2 = "Player2"
+        self.game = isolation.Board(self.player1, self.player2)
+        for move in [(2, 3), (4, 4)]:
+            self.game.apply_move(move)
+
+    def tearDown(self):
+        self.player1.close()
+
+    def test_get_move_before_timeout(self):
+        for _ in range(2):
+            start = timeit.default_timer()
+            time_left = lambda: 150 - 1000 * (timeit.default_timer() - start)
+            move = self.player1.get_move(self.game.copy(), time_left)
+            self.assertIn(move, self.game.get_legal_moves())
+            self.assertGreater(time_left(), 0)
+            self.game.apply_move(move)
+            self.game.apply_move(self.game.get_legal_moves()[0])
+
+    def test_choose_root_move(self):
+        default = (0, 0)
+        self.assertEqual(parallel_agent.choose_root_move([], default), default)
+        self.assertEqual(parallel_agent.choose_root_move([[], [(1., (1, 2))]],
+                                                         default), default)
+        # one worker did not return; the other results are still used
+        results = [[(0., (1, 2)), (2., (1, 2)), (5., (1, 2))],
+                   [(1., (2, 1)), (float("-inf"), (2, 1))]]
+        self.assertEqual(parallel_agent.choose_root_move(results, default),
+                         (1, 2))
+        self.assertEqual(parallel_agent.choose_root_move(results[1:],
+                                                         default), (2, 1))
+
+    def test_pickle_without_pool(self):
+        self.player1.get_move(self.game.copy(), lambda: 100.)
+        player = pickle.loads(pickle.dumps(self.player1))
+        self.assertIsNone(player._pool)
+        self.assertEqual(player.processes, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Unit tests for the memoizing evaluation function wrapper."""
+
+import random
+import unittest
+
+import game_agent
+import isolation
+from sample_players import improved_score
+from score_cache import ScoreCache
+
+
+class ScoreCacheTest(unittest.TestCase):
+    """The cache returns the values of the wrapped heuristic"""
+
+    def setUp(self):
+        self.calls = []
+
+        def score(game, player):
+            self.calls.append((game.hash(), player))
+            return improved_score(game, player)
+
+        self.cache = ScoreCache(score, size=2)
+        self.game = isolation.Board("Player1", "Player2")
+        for move in [(2, 3), (4, 4)]:
+            self.game.apply_move(move)
+
+    def test_values_are_cached_per_player(self):
+        game = self.game
+        for _ in range(3):
+            for player in ("Player1", "Player2"):
+                self.assertEqual(self.cache(game, player),
+                                 improved_score(game, player))
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (4, 2))
+        self.assertAlmostEqual(self.cache.hit_rate, 4 / 6.)
+
+    def test_least_recently_used_value_is_evicted(self):
+        first, second = [self.game.forecast_move(move)
+                         for move in self.game.get_legal_moves()[:2]]
+        self.cache(self.game, "Player1")
+        self.cache(first, "Player1")
+        self.cache(self.game, "Player1")
+        self.cache(second, "Player1")
+        self.assertEqual((len(self.cache), self.cache.evictions), (2, 1))
+        self.cache(self.game, "Player1")
+        self.assertEqual(len(self.calls), 3)
+        self.cache(first, "Player1")
+        self.assertEqual(len(self.calls), 4)
+
+    def test_search_results_are_unchanged(self):
+        self.assertIs(game_agent.get_batch_score(ScoreCache(improved_score)),
+                      game_agent.BATCH_SCORES[improved_score])
+        cache = ScoreCache(game_agent.custom_score_3)
+        results = []
+        for score_fn in (game_agent.custom_score_3, cache, cache):
+            player = game_agent.MinimaxPlayer(score_fn=score_fn)
+            player.time_left = lambda: 1000.
+            game = self.game.copy_with_players(player, "Player2")
+            # the moves are searched in random order; ties go to the first
+            random.seed(0)
+            results.append(player.minimax(game, 3))
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(cache.hits, cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
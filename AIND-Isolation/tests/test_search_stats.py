@@ -0,0 +1,96 @@
+"""Unit tests for the search instrumentation of the agents."""
+
+import os
+import tempfile
+import timeit
+import unittest
+
+import game_agent
+import isolation
+import search_stats
+from sample_players import improved_score
+
+
+class SearchStatsTest(unittest.TestCase):
+    """Instrumented agents record and log every move they play"""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_agents_are_not_instrumented_by_default(self):
+        self.assertIsNone(game_agent.AlphaBetaPlayer().stats)
+        self.assertIsNone(game_agent.MinimaxPlayer().stats)
+
+    def test_batch_scored_leaves_are_counted(self):
+        nodes = []
+        # the wrapper has no batch version, so its leaves are scored one by
+        # one, with cutoffs between them
+        for score_fn in (improved_score, lambda game, player:
+                         improved_score(game, player)):
+            player = search_stats.instrument(
+                game_agent.AlphaBetaPlayer(score_fn=score_fn))
+            player.time_left = lambda: 1000.
+            player.new_search()
+            game = isolation.Board(player, "Player2")
+            for move in [(2, 3), (4, 4)]:
+                game.apply_move(move)
+            player.alphabeta(game, 2)
+            nodes.append(player.stats.nodes)
+        self.assertGreaterEqual(nodes[0], nodes[1])
+
+    def test_records_of_a_searched_move(self):
+        player = search_stats.instrument(
+            game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                       opening_book=None),
+            self.path, "AB")
+        game = isolation.Board(player, "Player2")
+        for move in [(2, 3), (4, 4)]:
+            game.apply_move(move)
+        start = timeit.default_timer()
+        time_left = lambda: 100 - 1000 * (timeit.default_timer() - start)
+        move = player.get_move(game, time_left)
+
+        record = player.stats.records[-1]
+        self.assertEqual(record["move"], list(move))
+        self.assertEqual(record["source"], "search")
+        self.assertEqual(record["move_count"], 2)
+        self.assertGreaterEqual(record["depth"], 1)
+        self.assertEqual(record["depth"], record["iterations"][-1][0])
+        self.assertGreater(record["nodes"], record["depth"])
+        self.assertGreater(record["branching"], 1)
+        self.assertGreater(record["score_calls"], 0)
+        self.assertGreater(record["movegen_calls"], 0)
+        self.assertLess(record["score_ms"] + record["movegen_ms"],
+                        record["elapsed_ms"])
+        self.assertEqual(search_stats.read_log(self.path), [
+            dict(record, iterations=[list(i) for i in record["iterations"]])])
+
+    def test_summarize_game_log(self):
+        player_1 = search_stats.instrument(
+            game_agent.AlphaBetaPlayer(score_fn=improved_score),
+            self.path, "AB")
+        player_2 = search_stats.instrument(
+            game_agent.MinimaxPlayer(score_fn=improved_score),
+            self.path, "MM")
+        game = isolation.Board(player_1, player_2)
+        for move in [(2, 3), (4, 4)]:
+            game.apply_move(move)
+        _, history, _ = game.play(time_limit=150)
+
+        # the last move is logged even if it loses the game by forfeit
+        records = search_stats.read_log(self.path)
+        self.assertIn(len(records) - len(history), (0, 1))
+        summary = search_stats.summarize(records)
+        self.assertEqual(list(summary), ["AB", "MM"])
+        self.assertLessEqual(summary["MM"]["depth"], 3)
+        self.assertEqual(summary["AB"]["moves"] + summary["MM"]["moves"],
+                         len(records))
+        self.assertIn("MM", search_stats.format_summary(summary))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for the self-play pipeline."""
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+import game_agent
+import selfplay
+from isolation import Board
+from sample_players import GreedyPlayer, improved_score
+
+
+class ShardTest(unittest.TestCase):
+    """Shards are read back as written"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_shard_round_trip(self):
+        game = Board("Player1", "Player2", 9, 8)
+        positions = [game.get_position()]
+        for move in [(3, 3), (0, 0), (1, 5), (2, 2)]:
+            game.apply_move(move)
+            positions.append(game.get_position())
+        shard = selfplay.ShardBuffer(9, 8)
+        for ply, position in enumerate(positions):
+            shard.append(position, 7, ply, 1 - 2 * (ply % 2),
+                         None if ply == 0 else ply / 2., ply)
+        path = os.path.join(self.dir, "shard.bin")
+        shard.save(path)
+        self.assertEqual(os.path.getsize(path),
+                         16 + len(positions) * (9 + 4 + 2 + 4 + 1 + 4 + 1))
+
+        samples = [(sample.board.get_position(), sample.board.move_count,
+                    sample.game, sample.ply, sample.outcome, sample.score,
+                    sample.depth)
+                   for sample in selfplay.iter_samples(path)]
+        self.assertEqual(samples, [
+            (position, ply, 7, ply, 1 - 2 * (ply % 2),
+             None if ply == 0 else ply / 2., ply)
+            for ply, position in enumerate(positions)])
+
+    def test_generate(self):
+        # the other test modules reload game_agent, so the agent is created
+        # from the current class for the workers to unpickle it
+        agents = (game_agent.AlphaBetaPlayer(score_fn=improved_score),
+                  GreedyPlayer())
+        games, count = selfplay.generate(self.dir, 3, agents, processes=2,
+                                         games_per_shard=2, time_limit=50,
+                                         seed=0, verbose=False)
+        self.assertEqual(games, 4)
+        self.assertEqual(sorted(os.listdir(self.dir)),
+                         ["shard-00000.bin", "shard-00001.bin"])
+
+        samples = []
+        for name in sorted(os.listdir(self.dir)):
+            for sample in selfplay.iter_samples(
+                    os.path.join(self.dir, name)):
+                self.assertGreater(len(sample.board.get_legal_moves()), 1)
+                self.assertEqual(sample.board.move_count, sample.ply)
+                samples.append(sample[1:])
+        self.assertEqual(len(samples), count)
+        self.assertEqual(sorted(set(sample[0] for sample in samples)),
+                         [0, 1, 2, 3])
+        self.assertTrue(set(sample[2] for sample in samples) <= {-1, 1})
+        self.assertTrue(all(sample[1] >= selfplay.OPENING_PLIES
+                            for sample in samples))
+        # the greedy player does not search
+        searched = [sample for sample in samples if sample[3] is not None]
+        self.assertTrue(searched)
+        self.assertTrue(all(not math.isnan(sample[3])
+                            for sample in searched))
+        self.assertTrue(any(sample[3] is None for sample in samples))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Unit tests for the non-recursive alpha-beta agent."""
+
+import random
+import timeit
+import unittest
+
+import game_agent
+import isolation
+import search_stats
+import stack_search
+from sample_players import improved_score
+
+
+class StackAlphaBetaTest(unittest.TestCase):
+    """The explicit stack search matches the recursive search exactly"""
+
+    def search(self, cls, game, score_fn, max_depth):
+        player = search_stats.instrument(cls(score_fn=score_fn,
+                                             opening_book=None))
+        player.time_left = lambda: 1000.
+        player.new_search()
+        game = game.copy_with_active_player(player)
+        results = []
+        for depth in range(1, max_depth + 1):
+            player.pv_move = player.aspiration_search(game, depth)
+            results.append((player.pv_move, player.root_score))
+        return results, player.stats.nodes, player.stats.cutoffs
+
+    def test_same_results_as_recursive_search(self):
+        rng = random.Random(0)
+        for score_fn in (improved_score, game_agent.custom_score_3):
+            for _ in range(5):
+                game = isolation.Board("Player1", "Player2")
+                for _ in range(rng.randrange(2, 20)):
+                    moves = game.get_legal_moves(shuffle=False)
+                    if not moves:
+                        break
+                    game.apply_move(rng.choice(moves))
+                self.assertEqual(
+                    self.search(stack_search.StackAlphaBetaPlayer, game,
+                                score_fn, 5),
+                    self.search(game_agent.AlphaBetaPlayer, game,
+                                score_fn, 5))
+
+    def test_timeout_leaves_board_unchanged(self):
+        player = stack_search.StackAlphaBetaPlayer(score_fn=improved_score,
+                                                   check_interval=16)
+        game = isolation.Board(player, "Player2")
+        for move in [(2, 3), (4, 4)]:
+            game.apply_move(move)
+        before = game.to_string()
+        calls = []
+        player.time_left = lambda: calls.append(1) or 20. - len(calls)
+        self.assertRaises(game_agent.SearchTimeout, player.alphabeta, game, 20)
+        self.assertEqual(before, game.to_string())
+
+    def test_get_move_before_timeout(self):
+        player = stack_search.StackAlphaBetaPlayer(score_fn=improved_score)
+        game = isolation.Board(player, "Player2")
+        for move in [(2, 3), (4, 4)]:
+            game.apply_move(move)
+        start = timeit.default_timer()
+        time_left = lambda: 150 - 1000 * (timeit.default_timer() - start)
+        self.assertIn(player.get_move(game, time_left), game.get_legal_moves())
+        self.assertGreater(time_left(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
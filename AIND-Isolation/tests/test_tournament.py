@@ -0,0 +1,111 @@
+"""Unit tests for the tournament runner."""
+
+import multiprocessing
+import unittest
+
+import game_agent
+import tournament
+from sample_players import RandomPlayer, GreedyPlayer, improved_score
+
+
+class PlayRoundTest(unittest.TestCase):
+    """Seeded rounds give the same results serially and in parallel"""
+
+    def setUp(self):
+        self.cpu_agent = tournament.Agent(RandomPlayer(), "Random")
+        self.test_agents = [
+            tournament.Agent(GreedyPlayer(), "Greedy"),
+            tournament.Agent(game_agent.MinimaxPlayer(
+                search_depth=1, score_fn=improved_score), "MM_1")]
+
+    def play(self, seed, pool=None):
+        wins = {agent.player: 0 for agent in self.test_agents}
+        wins[self.cpu_agent.player] = 0
+        counts = tournament.play_round(self.cpu_agent, self.test_agents, wins,
+                                       3, seed, pool)
+        return wins, counts
+
+    def test_seeded_rounds_are_reproducible(self):
+        wins, counts = self.play(42)
+        self.assertEqual(sum(wins.values()), 12)
+        self.assertEqual((wins, counts), self.play(42))
+
+    def test_parallel_round_matches_serial(self):
+        pool = multiprocessing.Pool(2)
+        try:
+            self.assertEqual(self.play(7, pool), self.play(7))
+        finally:
+            pool.close()
+            pool.join()
+
+
+class GameTimingTest(unittest.TestCase):
+    """Alpha-beta agents return every move before the timer expires"""
+
+    def test_full_games_without_timeouts(self):
+        # the garbage collector must not pause the search past the deadline
+        player_1 = game_agent.AlphaBetaPlayer(score_fn=game_agent.custom_score)
+        player_2 = game_agent.AlphaBetaPlayer(score_fn=improved_score)
+        for seed, opening in enumerate([[(0, 3), (3, 1)], [(2, 2), (5, 6)],
+                                        [(6, 0), (1, 4)], [(3, 3), (4, 1)]]):
+            players = (player_1, player_2) if seed % 2 else (player_2,
+                                                             player_1)
+            _, termination, _ = tournament.play_game(
+                players + (opening, seed, tournament.TIME_LIMIT))
+            self.assertNotEqual(termination, "timeout")
+
+
+class ForfeitPlayer(object):
+    """Agent that forfeits every game."""
+
+    def get_move(self, game, time_left):
+        return (-1, -1)
+
+
+class SequentialTest(unittest.TestCase):
+    """Sequential pairings stop once the SPRT is decided"""
+
+    def setUp(self):
+        self.cpu_agent = tournament.Agent(RandomPlayer(), "Random")
+
+    def test_elo(self):
+        self.assertEqual(tournament.elo_difference(0.5), 0.)
+        self.assertAlmostEqual(tournament.elo_difference(
+            tournament.expected_score(150.)), 150.)
+        elo, low, high = tournament.elo_interval(15, 20)
+        self.assertTrue(low < elo < high)
+        elo, low, high = tournament.elo_interval(10, 10)
+        self.assertEqual(elo, float("inf"))
+        self.assertEqual(high, float("inf"))
+        self.assertTrue(0 < low < float("inf"))
+        self.assertGreater(tournament.elo_interval(100, 100)[1], low)
+
+    def test_sprt_decision(self):
+        sprt = tournament.DEFAULT_SPRT
+        self.assertIsNone(tournament.sprt_decision(2, 2, sprt))
+        self.assertEqual(tournament.sprt_decision(6, 0, sprt), "H1")
+        self.assertEqual(tournament.sprt_decision(0, 6, sprt), "H0")
+        self.assertIsNone(tournament.sprt_decision(4, 0, sprt))
+        self.assertAlmostEqual(tournament.sprt_llr(3, 3, sprt), 0.)
+
+    def test_sequential_round(self):
+        loser = tournament.Agent(ForfeitPlayer(), "Forfeit")
+        greedy = tournament.Agent(GreedyPlayer(), "Greedy")
+        wins, games, decisions, timeouts, forfeits = \
+            tournament.play_sequential_round(self.cpu_agent, [loser, greedy],
+                                             4, seed=3)
+        self.assertEqual(wins[loser.player], 0)
+        self.assertEqual(decisions[loser.player], "H0")
+        self.assertEqual(games[loser.player], 6)
+        self.assertTrue(2 <= games[greedy.player] <= 8)
+        if decisions[greedy.player] is None:
+            self.assertEqual(games[greedy.player], 8)
+        self.assertGreaterEqual(forfeits, 6)
+        self.assertEqual(
+            (wins, games, decisions, timeouts, forfeits),
+            tournament.play_sequential_round(self.cpu_agent, [loser, greedy],
+                                             4, seed=3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Unit tests for the heuristic weight tuner."""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import game_agent
+import selfplay
+import tuning
+from isolation import Board
+from sample_players import improved_score
+from score_cache import ScoreCache
+from tuning import WeightedScore
+
+
+def random_positions(seed, count=30):
+    """Return boards at random points of random games."""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        game = Board("Player1", "Player2")
+        for _ in range(rng.randrange(40)):
+            moves = game.get_legal_moves(shuffle=False)
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        boards.append(game)
+    return boards
+
+
+class WeightedScoreTest(unittest.TestCase):
+    """The weighted heuristic and its batch version agree"""
+
+    def test_matches_improved_score(self):
+        score = WeightedScore(tuning.INITIAL_WEIGHTS)
+        for game in random_positions(0):
+            for player in ("Player1", "Player2"):
+                self.assertEqual(score(game, player),
+                                 improved_score(game, player))
+
+    def test_batch_score(self):
+        score = WeightedScore((1., -1.5, -0.25, 0.5))
+        self.assertEqual(game_agent.get_batch_score(score), score.batch_score)
+        self.assertEqual(game_agent.get_batch_score(ScoreCache(score)),
+                         score.batch_score)
+        for game in random_positions(1):
+            for player in ("Player1", "Player2"):
+                expected = [(move, score(game.forecast_move(move), player))
+                            for move in game.get_legal_moves(shuffle=False)]
+                self.assertEqual(sorted(score.batch_score(game, player)),
+                                 sorted(expected))
+
+    def test_invalid_weights(self):
+        with self.assertRaises(ValueError):
+            WeightedScore((1., -1.))
+
+
+class TuneTest(unittest.TestCase):
+    """The tuner fits the weights to the outcomes"""
+
+    def test_tune_recovers_weights(self):
+        # outcomes drawn from known weights, in expectation
+        target = (0.5, -1., 0., -0.25)
+        data = {}
+        for own in range(9):
+            for opp in range(9):
+                for center in (0., 2.25, 6.25):
+                    p = tuning.win_probability(
+                        target[0] * own + target[1] * opp +
+                        target[3] * center)
+                    data[(own, opp, 1., center)] = [round(100 * p), 100]
+        initial = tuning.error(tuning.INITIAL_WEIGHTS, data)
+        weights, value = tuning.tune(data)
+        self.assertLess(value, initial)
+        self.assertAlmostEqual(value, tuning.error(weights, data))
+        for weight, expected in zip(weights, target):
+            self.assertAlmostEqual(weight, expected, delta=0.05)
+
+    def test_load_samples(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        shard = selfplay.ShardBuffer(7, 7)
+        games = random_positions(2, count=20)
+        for idx, game in enumerate(games):
+            shard.append(game.get_position(), idx, game.move_count,
+                         1 if idx % 3 else -1, None, 0)
+        path = os.path.join(directory, "shard.bin")
+        shard.save(path)
+
+        training, validation = tuning.load_samples([path], holdout=4)
+        self.assertEqual(sum(counts[1] for counts in training.values()), 15)
+        self.assertEqual(sum(counts[1] for counts in validation.values()), 5)
+        wins = sum(counts[0] for data in (training, validation)
+                   for counts in data.values())
+        self.assertEqual(wins, sum(1 for idx in range(20) if idx % 3))
+        key = tuning.features(games[1], games[1].active_player)
+        self.assertIn(key, training)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,21 +10,39 @@ The matches are fair because the board is initialized randomly for both
 players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
+
+With `--sprt ELO0 ELO1`, each pairing is a sequential probability ratio
+test instead of a fixed number of matches: matches are played until the
+games show, with error rates `--alpha` and `--beta`, whether the Elo
+difference of the test agent over the cpu agent is at least ELO1 or at most
+ELO0 (or until `--max-matches`). Lopsided pairings end after a few matches,
+and the Elo difference of every pairing is reported with its confidence
+interval.
 """
+import argparse
 import itertools
+import math
+import multiprocessing
 import random
 import warnings
 
 from collections import namedtuple
+from copy import deepcopy
+from statistics import NormalDist
 
 from isolation import Board
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
                         custom_score_2, custom_score_3)
+from opening_book import DEFAULT_BOOK_PATH
+from search_stats import format_summary, instrument, read_log, summarize
+from game_records import GameRecord, GameRecordWriter
 
 NUM_MATCHES = 5  # number of matches against each opponent
+MAX_MATCHES = 50  # maximum number of matches of a sequential pairing
 TIME_LIMIT = 150  # number of milliseconds before timeout
+CONFIDENCE = 0.95  # confidence level of the Elo intervals
 
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
@@ -36,37 +54,152 @@ game_agent.py.
 
 Agent = namedtuple("Agent", ["player", "name"])
 
+# Hypotheses of a sequential probability ratio test: the Elo difference is
+# at most `elo0` (H0) or at least `elo1` (H1), with a probability `alpha` of
+# accepting H1 when H0 holds and `beta` of accepting H0 when H1 holds
+SPRT = namedtuple("SPRT", ["elo0", "elo1", "alpha", "beta"])
+DEFAULT_SPRT = SPRT(-100., 100., 0.05, 0.05)
+
+
+def expected_score(elo):
+    """Return the expected score of a player with an Elo difference `elo`
+    over their opponent.
+    """
+    return 1. / (1. + 10 ** (-elo / 400.))
+
+
+def elo_difference(score):
+    """Return the Elo difference corresponding to an expected score."""
+    if score <= 0.:
+        return float("-inf")
+    if score >= 1.:
+        return float("inf")
+    return -400. * math.log10(1. / score - 1.)
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+
+def elo_interval(wins, games, confidence=CONFIDENCE):
+    """Estimate the Elo difference of a player from their wins.
+
+    The bounds are those of the Wilson score interval of the winning
+    probability, which stay finite when all the games are won or lost.
+
+    Returns
+    -------
+    (float, float, float)
+        The Elo difference and the bounds of its confidence interval.
+    """
+    if not games:
+        return 0., float("-inf"), float("inf")
+    z = NormalDist().inv_cdf((1. + confidence) / 2.)
+    p = wins / games
+    center = (p + z * z / (2 * games)) / (1 + z * z / games)
+    margin = (z / (1 + z * z / games) *
+              math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)))
+    return (elo_difference(p), elo_difference(center - margin),
+            elo_difference(center + margin))
+
+
+def sprt_llr(wins, losses, sprt):
+    """Return the log-likelihood ratio of H1 over H0 of an SPRT."""
+    p0 = expected_score(sprt.elo0)
+    p1 = expected_score(sprt.elo1)
+    return wins * math.log(p1 / p0) + losses * math.log((1 - p1) / (1 - p0))
+
+
+def sprt_decision(wins, losses, sprt):
+    """Return the hypothesis accepted by an SPRT ("H0" or "H1"), or None if
+    more games are needed.
+    """
+    llr = sprt_llr(wins, losses, sprt)
+    if llr >= math.log((1 - sprt.beta) / sprt.alpha):
+        return "H1"
+    if llr <= math.log(sprt.beta / (1 - sprt.alpha)):
+        return "H0"
+    return None
+
+
+def play_game(task):
+    """Play a single game from a fixed opening and random seed.
+
+    Each game is played by fresh copies of the agents, so the outcome does
+    not depend on the games played before it, or on the process it runs in.
+
+    Parameters
+    ----------
+    task : (object, object, list<(int, int)>, int, int)
+        The first and second player, the opening moves applied before the
+        game starts, the seed of the global random number generator, and the
+        time limit of each move in milliseconds.
+
+    Returns
+    -------
+    (int, str, list<(int, int)>)
+        The index of the winner (0 for the first player, 1 for the second),
+        the reason the game ended, and the moves played after the opening.
+    """
+    player_1, player_2, opening, seed, time_limit = task
+    player_1, player_2 = deepcopy((player_1, player_2))
+    random.seed(seed)
+    game = Board(player_1, player_2)
+    for move in opening:
+        game.apply_move(move)
+    winner, history, termination = game.play(time_limit=time_limit)
+    return int(winner is player_2), termination, [tuple(m) for m in history]
+
+
+def play_round(cpu_agent, test_agents, win_counts, num_matches, seed=None,
+               pool=None, game_log=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+
+    The openings and the random seed of every game are drawn from `seed`, so
+    a round gives the same games whether it is played serially or in the
+    worker processes of `pool`. The games are appended to `game_log` (a
+    `game_records.GameRecordWriter`) if given.
     """
-    timeout_count = 0
-    forfeit_count = 0
+    rng = random.Random(seed)
+    tasks = []
     for _ in range(num_matches):
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
-
         # initialize all games with a random move and response
+        opening = []
+        board = Board("Player1", "Player2")
+        size = (board.width, board.height)
         for _ in range(2):
-            move = random.choice(games[0].get_legal_moves())
-            for game in games:
-                game.apply_move(move)
-
-        # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
-            win_counts[winner] += 1
-
-            if termination == "timeout":
-                timeout_count += 1
-            elif termination == "forfeit":
-                forfeit_count += 1
+            move = rng.choice(board.get_legal_moves(shuffle=False))
+            board.apply_move(move)
+            opening.append(move)
+
+        for agent in test_agents:
+            tasks.append((cpu_agent.player, agent.player, opening,
+                          rng.getrandbits(32), TIME_LIMIT))
+            tasks.append((agent.player, cpu_agent.player, opening,
+                          rng.getrandbits(32), TIME_LIMIT))
+
+    if pool is None:
+        results = map(play_game, tasks)
+    else:
+        results = pool.imap(play_game, tasks)
+
+    # tally the results
+    timeout_count = 0
+    forfeit_count = 0
+    names = {agent.player: agent.name for agent in [cpu_agent] + test_agents}
+    for task, (winner, termination, moves) in zip(tasks, results):
+        win_counts[task[winner]] += 1
+        if game_log is not None:
+            opening = task[2]
+            game_log.write(GameRecord(
+                (names[task[0]], names[task[1]]), size[0], size[1],
+                opening + moves, len(opening), winner, termination, task[3]))
+
+        if termination == "timeout":
+            timeout_count += 1
+        elif termination == "forfeit":
+            forfeit_count += 1
 
     return timeout_count, forfeit_count
 
@@ -77,8 +210,16 @@ def update(total_wins, wins):
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
-    """Play matches between the test agent and each cpu_agent individually. """
+def play_matches(cpu_agents, test_agents, num_matches, seed=None,
+                 processes=1, game_log=None):
+    """Play matches between the test agent and each cpu_agent individually.
+
+    The games of each round are played in a pool of `processes` worker
+    processes when more than one is requested; the results are the same as
+    a serial tournament with the same seed.
+    """
+    rng = random.Random(seed)
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
     total_wins = {agent.player: 0 for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
@@ -87,24 +228,32 @@ def play_matches(cpu_agents, test_agents, num_matches):
     print("\n{:^9}{:^13}".format("Match #", "Opponent") + ''.join(['{:^13}'.format(x[1].name) for x in enumerate(test_agents)]))
     print("{:^9}{:^13} ".format("", "") +  ' '.join(['{:^5}| {:^5}'.format("Won", "Lost") for x in enumerate(test_agents)]))
 
-    for idx, agent in enumerate(cpu_agents):
-        wins = {key: 0 for (key, value) in test_agents}
-        wins[agent.player] = 0
-
-        print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
-
-        counts = play_round(agent, test_agents, wins, num_matches)
-        total_timeouts += counts[0]
-        total_forfeits += counts[1]
-        total_wins = update(total_wins, wins)
-        _total = 2 * num_matches
-        round_totals = sum([[wins[agent.player], _total - wins[agent.player]]
-                            for agent in test_agents], [])
-        print(' ' + ' '.join([
-            '{:^5}| {:^5}'.format(
-                round_totals[i],round_totals[i+1]
-            ) for i in range(0, len(round_totals), 2)
-        ]))
+    try:
+        for idx, agent in enumerate(cpu_agents):
+            wins = {key: 0 for (key, value) in test_agents}
+            wins[agent.player] = 0
+
+            print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="",
+                  flush=True)
+
+            counts = play_round(agent, test_agents, wins, num_matches,
+                                rng.getrandbits(32), pool, game_log)
+            total_timeouts += counts[0]
+            total_forfeits += counts[1]
+            total_wins = update(total_wins, wins)
+            _total = 2 * num_matches
+            round_totals = sum([[wins[agent.player],
+                                 _total - wins[agent.player]]
+                                for agent in test_agents], [])
+            print(' ' + ' '.join([
+                '{:^5}| {:^5}'.format(
+                    round_totals[i],round_totals[i+1]
+                ) for i in range(0, len(round_totals), 2)
+            ]))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
 
     print("-" * 74)
     print('{:^9}{:^13}'.format("", "Win Rate:") +
@@ -124,17 +273,146 @@ def play_matches(cpu_agents, test_agents, num_matches):
                "legal moves available to play.\n").format(total_forfeits))
 
 
-def main():
+def play_sequential_round(cpu_agent, test_agents, max_matches,
+                          sprt=DEFAULT_SPRT, seed=None, pool=None,
+                          game_log=None):
+    """Play matches between the cpu agent and each test agent until an SPRT
+    decides the pairing, or `max_matches` matches.
+
+    The test agents play one "fair" match at a time against the cpu agent,
+    and stop as soon as their test is decided; the pairings still undecided
+    share the openings of each match. Like `play_round()`, the games are
+    drawn from `seed`, and are the same serially or in `pool`.
+
+    Returns
+    -------
+    (dict, dict, dict, int, int)
+        The number of wins and of games of each test agent, the hypothesis
+        accepted for each test agent (None if undecided), and the number of
+        timeouts and forfeits.
+    """
+    rng = random.Random(seed)
+    win_counts = {agent.player: 0 for agent in test_agents}
+    win_counts[cpu_agent.player] = 0
+    games = {agent.player: 0 for agent in test_agents}
+    decisions = {agent.player: None for agent in test_agents}
+    timeout_count = forfeit_count = 0
+    active = list(test_agents)
+    for _ in range(max_matches):
+        counts = play_round(cpu_agent, active, win_counts, 1,
+                            rng.getrandbits(32), pool, game_log)
+        timeout_count += counts[0]
+        forfeit_count += counts[1]
+        for agent in active:
+            games[agent.player] += 2
+            wins = win_counts[agent.player]
+            decisions[agent.player] = sprt_decision(
+                wins, games[agent.player] - wins, sprt)
+        active = [agent for agent in active
+                  if decisions[agent.player] is None]
+        if not active:
+            break
+    del win_counts[cpu_agent.player]
+    return win_counts, games, decisions, timeout_count, forfeit_count
+
+
+def format_elo(wins, games, confidence=CONFIDENCE):
+    """Return an Elo difference and its confidence interval as text."""
+    elo, low, high = elo_interval(wins, games, confidence)
+    return "{:+.0f} [{:+.0f},{:+.0f}]".format(elo, low, high)
+
+
+def play_sequential_matches(cpu_agents, test_agents, max_matches,
+                            sprt=DEFAULT_SPRT, seed=None, processes=1,
+                            game_log=None, confidence=CONFIDENCE):
+    """Play an SPRT between the test agent and each cpu_agent individually,
+    and print the Elo difference of every pairing with its confidence
+    interval.
+    """
+    rng = random.Random(seed)
+    pool = multiprocessing.Pool(processes) if processes > 1 else None
+    total_wins = {agent.player: 0 for agent in test_agents}
+    total_games = {agent.player: 0 for agent in test_agents}
+    total_timeouts = 0
+    total_forfeits = 0
+    marks = {"H1": "+", "H0": "-", None: "?"}
+
+    print("\nSPRT: H0 Elo <= {:+g}, H1 Elo >= {:+g}, alpha {:g}, beta {:g}; "
+          "Elo with {:g}% intervals".format(sprt.elo0, sprt.elo1, sprt.alpha,
+                                            sprt.beta, 100 * confidence))
+    print("\n{:^9}{:^13}".format("Match #", "Opponent") +
+          ''.join(['{:^18}'.format(agent.name) for agent in test_agents]))
+
+    try:
+        for idx, agent in enumerate(cpu_agents):
+            print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="",
+                  flush=True)
+            wins, games, decisions, timeouts, forfeits = play_sequential_round(
+                agent, test_agents, max_matches, sprt, rng.getrandbits(32),
+                pool, game_log)
+            total_timeouts += timeouts
+            total_forfeits += forfeits
+            print(''.join(['{:^18}'.format(format_elo(
+                wins[test.player], games[test.player], confidence))
+                for test in test_agents]))
+            print("{:^22}".format("") + ''.join(['{:^18}'.format(
+                "{} games {}".format(games[test.player],
+                                     marks[decisions[test.player]]))
+                for test in test_agents]))
+            total_wins = update(total_wins, wins)
+            total_games = update(total_games, games)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    print("-" * (22 + 18 * len(test_agents)))
+    print('{:^9}{:^13}'.format("", "Win Rate:") + ''.join([
+        '{:^18}'.format("{:.1f}%".format(
+            100 * total_wins[agent.player] / total_games[agent.player]))
+        for agent in test_agents]))
+    played = sum(total_games.values())
+    print("\n{} games played (+ stronger, - weaker, ? undecided); the fixed "
+          "tournament of {} matches per pairing plays {}.".format(
+              played, max_matches,
+              2 * max_matches * len(cpu_agents) * len(test_agents)))
+
+    if total_timeouts:
+        print(("\nThere were {} timeouts during the tournament -- make sure " +
+               "your agent handles search timeout correctly, and consider " +
+               "increasing the timeout margin for your agent.\n").format(
+            total_timeouts))
+    if total_forfeits:
+        print(("\nYour agents forfeited {} games while there were still " +
+               "legal moves available to play.\n").format(total_forfeits))
+
+
+def print_stats(log_path):
+    """Print the search statistics of the agents aggregated from a log."""
+    print("\n{:^74}".format("Search statistics (searched moves)"))
+    print(format_summary(summarize(read_log(log_path))))
+
+
+def main(seed=None, processes=1, stats_log=None, game_log=None, sprt=None,
+         max_matches=MAX_MATCHES):
 
     # Define two agents to compare -- these agents will play from the same
-    # starting position against the same adversaries in the tournament
+    # starting position against the same adversaries in the tournament (the
+    # shipped opening book was generated with custom_score)
     test_agents = [
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score,
+                              opening_book=DEFAULT_BOOK_PATH), "AB_Custom"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
     ]
 
+    # Record the search of every move of the test agents in the log
+    if stats_log is not None:
+        open(stats_log, "w").close()
+        for agent in test_agents:
+            instrument(agent.player, stats_log, agent.name)
+
     # Define a collection of agents to compete against the test agents
     cpu_agents = [
         Agent(RandomPlayer(), "Random"),
@@ -150,8 +428,53 @@ def main():
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    # Append every game to the game log
+    writer = GameRecordWriter(game_log) if game_log is not None else None
+    try:
+        if sprt is None:
+            play_matches(cpu_agents, test_agents, NUM_MATCHES, seed,
+                         processes, writer)
+        else:
+            play_sequential_matches(cpu_agents, test_agents, max_matches,
+                                    sprt, seed, processes, writer)
+    finally:
+        if writer is not None:
+            writer.close()
+    if stats_log is not None:
+        print_stats(stats_log)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Play a round-robin " +
+        "tournament between the test agents and the cpu agents.")
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help="Seed of the random openings and of the games.")
+    parser.add_argument('-p', '--processes', type=int, default=1,
+                        help="Number of worker processes playing the games.")
+    parser.add_argument('--stats-log', default=None,
+                        help="Log the search statistics of the test agents " +
+                        "to this file (one JSON record per move) and print " +
+                        "a summary at the end.")
+    parser.add_argument('--game-log', default=None,
+                        help="Append every game to this game record file " +
+                        "(see game_records.py).")
+    parser.add_argument('--sprt', type=float, nargs=2, default=None,
+                        metavar=("ELO0", "ELO1"),
+                        help="Play each pairing until a sequential test " +
+                        "decides whether the Elo difference of the test " +
+                        "agent is at most ELO0 or at least ELO1 (e.g., " +
+                        "-100 100).")
+    parser.add_argument('--alpha', type=float, default=DEFAULT_SPRT.alpha,
+                        help="Probability of the sequential test accepting " +
+                        "ELO1 when ELO0 holds.")
+    parser.add_argument('--beta', type=float, default=DEFAULT_SPRT.beta,
+                        help="Probability of the sequential test accepting " +
+                        "ELO0 when ELO1 holds.")
+    parser.add_argument('--max-matches', type=int, default=MAX_MATCHES,
+                        help="Maximum number of matches of a pairing in " +
+                        "the sequential test.")
+    args = parser.parse_args()
+    sprt = (None if args.sprt is None else
+            SPRT(args.sprt[0], args.sprt[1], args.alpha, args.beta))
+    main(args.seed, args.processes, args.stats_log, args.game_log, sprt,
+         args.max_matches)
@@ -0,0 +1,234 @@
+"""Tune the weights of a parameterized evaluation function on self-play data.
+
+`WeightedScore` is a family of heuristics: a weighted sum of the features
+of `FEATURES`, computed for the player the position is scored for. The
+weights (1, -1, 0, 0) give `improved_score` and (1, -2, 0, 0) give
+`custom_score_2`; the tuner looks for better ones.
+
+The tuner fits the weights by Texel-style regression on positions recorded
+by `selfplay.py`: the score of a position, through the logistic function,
+is read as the probability that the player to move wins, and the weights
+are chosen to minimize the mean squared error between that probability and
+the outcome of the game, by a local search that tries to move each weight
+up or down by a step and halves the step when no move improves the error.
+
+The features take few distinct values, so the samples are first grouped by
+feature vector: millions of positions reduce to a few thousand distinct
+vectors, and every error evaluation only goes over those. The games of one
+sample in `HOLDOUT` are kept out of the fit to check the tuned weights:
+
+    python selfplay.py --games 10000 --processes 8 --out-dir samples
+    python tuning.py samples/*.bin
+
+The search is not affected by the scale of the weights, so the tuned
+weights can be used as they are:
+
+    player = AlphaBetaPlayer(score_fn=WeightedScore(weights))
+"""
+import argparse
+import math
+
+from game_agent import child_mobilities
+from selfplay import iter_samples
+
+# Features of a position for a player: the number of legal moves of the
+# player and of their opponent, and the squared distance of the player and of
+# their opponent to the center of the board
+FEATURES = ("own_moves", "opp_moves", "own_center", "opp_center")
+
+# Weights of improved_score
+INITIAL_WEIGHTS = (1., -1., 0., 0.)
+
+# One game in HOLDOUT is used to validate the weights instead of fitting them
+HOLDOUT = 10
+
+
+def center_distance(game, location):
+    """Return the squared distance of a location to the center of the board
+    (0 before the player's first move).
+    """
+    if location is None:
+        return 0.
+    row, col = location
+    return (game.height / 2. - row)**2 + (game.width / 2. - col)**2
+
+
+def features(game, player):
+    """Return the values of FEATURES in a game state for the given player."""
+    opponent = game.get_opponent(player)
+    return (game.count_legal_moves(player), game.count_legal_moves(opponent),
+            center_distance(game, game.get_player_location(player)),
+            center_distance(game, game.get_player_location(opponent)))
+
+
+class WeightedScore(object):
+    """A heuristic evaluation function computing a weighted sum of FEATURES.
+
+    Instances are picklable, so they can be used by the agents of the
+    parallel tournament.
+
+    Parameters
+    ----------
+    weights : sequence of float
+        The weight of each feature of FEATURES.
+    """
+    def __init__(self, weights):
+        if len(weights) != len(FEATURES):
+            raise ValueError("Expected {} weights, got {}.".format(
+                len(FEATURES), len(weights)))
+        self.weights = tuple(float(w) for w in weights)
+
+    def __repr__(self):
+        return "WeightedScore({!r})".format(self.weights)
+
+    def __call__(self, game, player):
+        """Calculate the heuristic value of a game state from the point of
+        view of the given player.
+        """
+        values = features(game, player)
+        own_moves, opp_moves = values[:2]
+        # the game is over when the player to move has no legal moves
+        if player == game.active_player:
+            if own_moves == 0:
+                return float("-inf")
+        elif opp_moves == 0:
+            return float("inf")
+        return float(sum(w * f for w, f in zip(self.weights, values)))
+
+    def batch_score(self, game, player):
+        """Calculate the heuristic value of every child of a game state at
+        once (see `game_agent.custom_score_batch()`).
+        """
+        w_own, w_opp, w_own_center, w_opp_center = self.weights
+        mover = player == game.active_player
+        # the active player moves to the cell of the move, and the other
+        # player stays where they are
+        still = center_distance(game,
+                                game.get_player_location(game.inactive_player))
+        scores = []
+        for move, own, opp in child_mobilities(game, player):
+            if (opp if mover else own) == 0:
+                scores.append((move, float("inf") if mover else float("-inf")))
+                continue
+            moved = center_distance(game, move)
+            own_center, opp_center = (moved, still) if mover else (still,
+                                                                   moved)
+            scores.append((move, float(
+                w_own * own + w_opp * opp + w_own_center * own_center +
+                w_opp_center * opp_center)))
+        return scores
+
+
+def load_samples(paths, holdout=HOLDOUT):
+    """Read self-play shards and group their samples by feature vector.
+
+    Returns
+    -------
+    (dict, dict)
+        The training and validation sets, mapping the feature vector of each
+        position (for the player to move) to the number of games won by the
+        player to move and the number of samples. The games whose index is a
+        multiple of `holdout` form the validation set (none if `holdout` is
+        0).
+    """
+    training, validation = {}, {}
+    for path in paths:
+        for sample in iter_samples(path):
+            game = sample.board
+            data = (validation if holdout and sample.game % holdout == 0
+                    else training)
+            counts = data.setdefault(features(game, game.active_player),
+                                     [0, 0])
+            counts[0] += sample.outcome > 0
+            counts[1] += 1
+    return training, validation
+
+
+def win_probability(score):
+    """Return the logistic function of a score."""
+    return 1. / (1. + math.exp(-max(min(score, 50.), -50.)))
+
+
+def error(weights, data):
+    """Return the mean squared error of the win probabilities predicted with
+    the weights for the samples of a set of `load_samples()`.
+    """
+    total = 0.
+    count = 0
+    for values, (wins, samples) in data.items():
+        p = win_probability(sum(w * f for w, f in zip(weights, values)))
+        # `wins` samples with outcome 1, the others with outcome 0
+        total += wins * (1. - p)**2 + (samples - wins) * p * p
+        count += samples
+    return total / count if count else 0.
+
+
+def tune(data, weights=INITIAL_WEIGHTS, step=0.5, min_step=1/256.,
+         max_passes=1000, verbose=False):
+    """Fit the weights to a set of `load_samples()` by local search.
+
+    Each pass tries to move every weight up or down by `step`, keeping the
+    first move that lowers the error; the step is halved after a pass
+    without any improvement, until it is smaller than `min_step`.
+
+    Returns
+    -------
+    (tuple<float>, float)
+        The tuned weights and their error.
+    """
+    weights = list(weights)
+    best = error(weights, data)
+    for _ in range(max_passes):
+        if step < min_step:
+            break
+        improved = False
+        for idx in range(len(weights)):
+            for delta in (step, -step):
+                weights[idx] += delta
+                value = error(weights, data)
+                if value < best:
+                    best = value
+                    improved = True
+                    break
+                weights[idx] -= delta
+        if not improved:
+            step /= 2.
+        if verbose:
+            print("error {:.6f}, step {:g}, weights {}".format(
+                best, step, format_weights(weights)))
+    return tuple(weights), best
+
+
+def format_weights(weights):
+    """Return weights as a comma-separated list of `feature=weight`."""
+    return ", ".join("{}={:.4f}".format(name, w)
+                     for name, w in zip(FEATURES, weights))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune the weights of " +
+        "WeightedScore on positions recorded by selfplay.py.")
+    parser.add_argument('paths', nargs='+', help="The sample shard files.")
+    parser.add_argument('-w', '--weights', type=float, nargs=len(FEATURES),
+                        default=list(INITIAL_WEIGHTS), metavar="W",
+                        help="Initial weights, in the order of " +
+                        ", ".join(FEATURES) + ".")
+    parser.add_argument('--holdout', type=int, default=HOLDOUT,
+                        help="Validate on one game in HOLDOUT (0 for none).")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="Print the error after every pass.")
+    args = parser.parse_args()
+
+    training, validation = load_samples(args.paths, args.holdout)
+    print("{} training samples ({} distinct), {} validation samples".format(
+        sum(counts[1] for counts in training.values()), len(training),
+        sum(counts[1] for counts in validation.values())))
+    print("Initial weights: {}".format(format_weights(args.weights)))
+    print("  training error {:.6f}, validation error {:.6f}".format(
+        error(args.weights, training), error(args.weights, validation)))
+    weights, value = tune(training, args.weights, verbose=args.verbose)
+    print("Tuned weights: {}".format(format_weights(weights)))
+    print("  training error {:.6f}, validation error {:.6f}".format(
+        value, error(weights, validation)))
+    print("Use with: AlphaBetaPlayer(score_fn=WeightedScore({!r}))".format(
+        weights))